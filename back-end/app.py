@@ -1,58 +1,141 @@
+import contextvars
+import hashlib
+import json
+import logging
 import random
-from flask import Flask, request, jsonify
+import queue
+import threading
+import time
+import click
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
-import requests
 import os
 from dotenv import load_dotenv
+from batch import SharedCollection, parse_requests, run_batch
+from cache import cache_from_env, make_cache_key
+from constants import TIPO_VIAJANTE_PESOS
+from google_client import GoogleApiError, GoogleQuotaError, client_from_env
+from jobs import JobManager, JobQueueFull
+from logs import configure_logging
+from metrics import Profiler, record_span, registry, span
+from place_index import crawl_destination, index_from_env
+from planner import build_query_plan, crawl_queries
+from scheduler import iter_days
+from scoring import SCORE_MINIMO, relevance_filter, score_places
+from singleflight import SingleFlight
+from spatial import cluster_days, day_distances_km, spatial_available
 
 load_dotenv()
 
+GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
+# Log com nível configurável (LOG_LEVEL, LOG_FORMAT); a chave da API nunca é logada
+configure_logging(segredos=[GOOGLE_API_KEY])
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["ETag"])
 
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 if not GOOGLE_API_KEY:
-    print("ERRO: GOOGLE_API_KEY não configurada nas variáveis de ambiente.")
-
-PLACES_API_BASE_URL = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-GEOCODING_API_BASE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
-
-INTERESTS_TO_PLACE_TYPES = {
-    "praias": ["beach", "natural_feature"],
-    "museus": ["museum", "art_gallery"],
-    "trilhas": ["park", "natural_feature", "point_of_interest"],
-    "vida-noturna": ["night_club", "bar"],
-    "compras": ["shopping_mall", "store", "department_store"],
-    "gastronomia": ["restaurant", "food", "cafe", "bakery"],
-    "monumentos": ["point_of_interest", "tourist_attraction", "historic_site"],
-    "historia": ["historic_site", "museum", "church", "synagogue", "hindu_temple", "mosque"],
-    "fotografia": ["tourist_attraction", "point_of_interest", "park", "natural_feature"],
-    "relax": ["spa", "park", "beach", "beauty_salon"],
-    "romance": ["restaurant", "point_of_interest", "park", "bar"],
-    "arte": ["art_gallery", "museum"],
-    "parques": ["amusement_park", "park", "zoo"],
-    "diversao": ["amusement_park", "park", "aquarium", "bowling_alley", "movie_theater"],
-    "natureza": ["natural_feature", "park"],
-    "aventura": ["park", "natural_feature", "amusement_park"]
-}
-
-TIPO_VIAJANTE_PESOS = {
-    "familia": {"park": 4, "amusement_park": 5, "zoo": 4, "aquarium": 4, "museum": 3, "beach": 3},
-    "aventureiro": {"natural_feature": 5, "park": 4, "beach": 4, "night_club": 3, "bar": 3},
-    "cultural": {"museum": 5, "art_gallery": 4, "historic_site": 4, "point_of_interest": 3},
-    "gastronomico": {"restaurant": 6, "food": 5, "cafe": 4, "bakery": 3},
-    "casais": {"restaurant": 4, "point_of_interest": 4, "park": 3, "bar": 3, "spa": 3},
-    "relax": {"spa": 5, "park": 4, "beach": 4, "beauty_salon": 3}
-}
-
-PRICE_LEVEL_MAP = {
-    0: "Grátis",
-    1: "Barato",
-    2: "Moderado",
-    3: "Caro",
-    4: "Muito Caro"
-}
+    logger.error("GOOGLE_API_KEY não configurada nas variáveis de ambiente.")
+
+# Base das APIs do Google; pode apontar para um servidor local (bench/fake_google.py)
+GOOGLE_MAPS_API_BASE = os.getenv('GOOGLE_MAPS_API_BASE', "https://maps.googleapis.com/maps/api").rstrip('/')
+PLACES_API_BASE_URL = f"{GOOGLE_MAPS_API_BASE}/place/textsearch/json"
+GEOCODING_API_BASE_URL = f"{GOOGLE_MAPS_API_BASE}/geocode/json"
+
+# Limites da coleta paralela de lugares (por requisição)
+PLACES_MAX_CONCURRENCY = int(os.getenv('PLACES_MAX_CONCURRENCY', '8'))
+PLACES_COLLECTION_TIMEOUT = float(os.getenv('PLACES_COLLECTION_TIMEOUT', '20'))
+
+# Orçamento de chamadas à Places API por requisição e alvo de candidatos (dias * 3 * fator)
+PLACES_QUERY_BUDGET = int(os.getenv('PLACES_QUERY_BUDGET', '24'))
+PLACES_CANDIDATE_FACTOR = float(os.getenv('PLACES_CANDIDATE_FACTOR', '2'))
+
+# Paginação da Text Search: páginas por consulta (o Google entrega até 3), espera até o
+# next_page_token valer e por quanto tempo um token recebido é usado antes de ser renovado
+PLACES_MAX_PAGES = int(os.getenv('PLACES_MAX_PAGES', '3'))
+PLACES_PAGE_TOKEN_DELAY = float(os.getenv('PLACES_PAGE_TOKEN_DELAY', '2'))
+PLACES_PAGE_TOKEN_RETRIES = 2
+PLACES_PAGE_TOKEN_TTL = float(os.getenv('PLACES_PAGE_TOKEN_TTL', '60'))
+# Só um token emitido há menos que isso pode ainda não estar valendo (INVALID_REQUEST é repetido)
+PLACES_PAGE_TOKEN_WARMUP = PLACES_PAGE_TOKEN_DELAY * (PLACES_PAGE_TOKEN_RETRIES + 1)
+
+# Destinos processados em paralelo na geração em lote
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '4'))
+# Teto para ?workers= da rota de lote: cada worker abre o seu próprio pool de consultas
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', str(BATCH_WORKERS)))
+
+# Agrupamento geográfico dos dias (requer NumPy)
+SPATIAL_CLUSTERING = os.getenv('SPATIAL_CLUSTERING', '1') == '1' and spatial_available()
+
+# Cliente HTTP compartilhado (pool de conexões, rate limit e retentativas)
+google_client = client_from_env()
+
+# Cache das respostas do Google (TTL em segundos por endpoint)
+api_cache = cache_from_env({
+    GEOCODING_API_BASE_URL: int(os.getenv('GEOCODING_CACHE_TTL', str(30 * 24 * 3600))),
+    PLACES_API_BASE_URL: int(os.getenv('PLACES_CACHE_TTL', str(24 * 3600))),
+})
+# Cache de roteiros prontos, por parâmetros normalizados (TTL em segundos)
+ROTEIRO_CACHE_ENDPOINT = "roteiro"
+roteiro_cache = cache_from_env(
+    {ROTEIRO_CACHE_ENDPOINT: int(os.getenv('ROTEIRO_CACHE_TTL', str(6 * 3600)))},
+    max_entries=int(os.getenv('ROTEIRO_CACHE_MAX_ENTRIES', '256')),
+)
+# Índice local de lugares por destino, aquecido pelo comando aquecer-indice (None se desativado)
+place_index = index_from_env()
+# Roteiros determinísticos: sem "seed" explícita, a semente vem dos parâmetros da requisição
+ROTEIRO_DETERMINISTIC = os.getenv('ROTEIRO_DETERMINISTIC', '1') == '1'
+
+# Somente respostas bem-sucedidas são cacheadas; erros de quota ou de chave não.
+CACHEABLE_STATUSES = ("OK", "ZERO_RESULTS")
+
+# Perfis de requisições amostradas (ou pedidas com o header X-Roteiro-Perfil: 1), em /metrics/perfis
+profiler = Profiler(
+    taxa=float(os.getenv('METRICS_PROFILE_SAMPLE_RATE', '0')),
+    max_perfis=int(os.getenv('METRICS_PROFILE_MAX', '50')),
+)
+HTTP_REQUISICOES = registry.counter("http_requisicoes_total", "Requisições HTTP por rota, método e status.", ("rota", "metodo", "status"))
+HTTP_DURACAO = registry.histogram("http_requisicao_segundos", "Duração das requisições HTTP até a resposta.", ("rota",))
+
+# Chamadas ao Google e roteiros idênticos em andamento são compartilhados entre requisições
+chamadas_em_andamento = SingleFlight()
+roteiros_em_andamento = SingleFlight()
+
+# Modo assíncrono: pool de jobs, limite da fila, retenção dos resultados e espera máxima do long-poll
+ROTEIRO_JOB_MAX_WAIT = float(os.getenv('ROTEIRO_JOB_MAX_WAIT', '30'))
+roteiro_jobs = JobManager(
+    workers=int(os.getenv('ROTEIRO_JOB_WORKERS', '4')),
+    max_pendentes=int(os.getenv('ROTEIRO_JOB_MAX_PENDING', '64')),
+    retencao=int(os.getenv('ROTEIRO_JOB_RETENTION', '600')),
+)
+
+def fetch_google(url, params):
+    """
+    Faz a chamada ao Google e guarda a resposta no cache. Chamadas idênticas que chegam
+    enquanto uma já está em andamento esperam por ela em vez de repetir a ida ao Google.
+    """
+    def buscar():
+        data = google_client.get_json(url, params)
+        # Páginas seguintes (pedidas por token, de uso único) não são cacheadas
+        if data.get('status') in CACHEABLE_STATUSES and 'pagetoken' not in params:
+            api_cache.set(url, params, without_page_token(data))
+        return data
+    return chamadas_em_andamento.do(make_cache_key(url, params), buscar)
+
+def without_page_token(data):
+    """
+    Cópia da resposta para o cache, sem o next_page_token: o token expira em minutos,
+    então só fica registrado que há mais páginas ("mais_paginas").
+    """
+    if 'next_page_token' not in data:
+        return data
+    data = {chave: valor for chave, valor in data.items() if chave != 'next_page_token'}
+    data['mais_paginas'] = True
+    return data
 
 def get_coordinates(city_name):
     """Obtém as coordenadas geográficas de uma cidade usando a Geocoding API."""
@@ -60,25 +143,102 @@ def get_coordinates(city_name):
         "address": city_name,
         "key": GOOGLE_API_KEY
     }
-    response = requests.get(GEOCODING_API_BASE_URL, params=params)
-    data = response.json()
+    data = api_cache.get(GEOCODING_API_BASE_URL, params)
+    if data is None:
+        data = fetch_google(GEOCODING_API_BASE_URL, params)
 
     if data['status'] == 'OK' and data['results']:
         location = data['results'][0]['geometry']['location']
         return f"{location['lat']},{location['lng']}"
-    print(f"DEBUG: Não foi possível obter coordenadas para '{city_name}'. Status: {data.get('status', 'N/A')}, Mensagem: {data.get('error_message', 'N/A')}")
+    logger.warning("Não foi possível obter coordenadas para '%s'. Status: %s, Mensagem: %s",
+                   city_name, data.get('status', 'N/A'), data.get('error_message', 'N/A'))
     return None
 
-def search_places(query, location_bias=None, place_types=None, min_price=None, max_price=None):
+class PageCursor:
+    """
+    Página seguinte de uma busca na Places API.
+
+    token é o next_page_token recebido ao vivo, ou None quando a página anterior veio do
+    cache ou do índice (tokens expiram em minutos e nunca são guardados). renovacoes conta
+    as chamadas feitas para obter um token novo ao buscar a página.
+    """
+
+    __slots__ = ("pagina", "token", "emitido_em", "renovacoes")
+
+    def __init__(self, pagina, token=None):
+        self.pagina = pagina
+        self.token = token
+        self.emitido_em = time.monotonic()
+        self.renovacoes = 0
+
+    def idade(self):
+        return time.monotonic() - self.emitido_em
+
+    def valido(self):
+        return self.token is not None and self.idade() < PLACES_PAGE_TOKEN_TTL
+
+def places_page(query, data, pagina, ao_vivo=True):
+    """(lugares, PageCursor da página seguinte ou None) de uma resposta da Text Search."""
+    if data['status'] == 'OK':
+        logger.debug("Busca '%s' (página %d) retornou %d resultados.", query, pagina, len(data['results']))
+        proxima = None
+        if ao_vivo and data.get('next_page_token'):
+            proxima = PageCursor(pagina + 1, data['next_page_token'])
+        elif data.get('next_page_token') or data.get('mais_paginas'):
+            proxima = PageCursor(pagina + 1)
+        return data['results'], proxima
+    if data['status'] != 'ZERO_RESULTS':
+        logger.warning("Erro ao buscar lugares (query: '%s', página %d): %s",
+                       query, pagina, data.get('error_message', data['status']))
+    return [], None
+
+def fetch_page(cursor):
+    """Busca ao vivo a página do cursor pelo seu next_page_token."""
+    params = {"pagetoken": cursor.token, "key": GOOGLE_API_KEY}
+    data = fetch_google(PLACES_API_BASE_URL, params)
+    # O next_page_token só passa a valer alguns instantes depois de emitido; um token mais
+    # antigo que isso e recusado está vencido, e esperar não adianta
+    tentativas = 0
+    while (data.get('status') == 'INVALID_REQUEST' and tentativas < PLACES_PAGE_TOKEN_RETRIES
+           and cursor.idade() < PLACES_PAGE_TOKEN_WARMUP):
+        tentativas += 1
+        time.sleep(PLACES_PAGE_TOKEN_DELAY)
+        data = fetch_google(PLACES_API_BASE_URL, params)
+    return data
+
+def renew_page_cursor(query, params, pagina):
+    """
+    Refaz ao vivo (sem cache) as páginas anteriores a `pagina` para obter um
+    next_page_token novo; retorna (PageCursor da página ou None se ela não existir mais,
+    chamadas feitas).
+    """
+    data = fetch_google(PLACES_API_BASE_URL, params)
+    chamadas = 1
+    atual = 1
+    while data.get('status') == 'OK' and data.get('next_page_token'):
+        cursor = PageCursor(atual + 1, data['next_page_token'])
+        if cursor.pagina >= pagina:
+            return cursor, chamadas
+        data = fetch_page(cursor)
+        chamadas += 1
+        atual += 1
+    return None, chamadas
+
+def search_places(query, location_bias=None, place_types=None, min_price=None, max_price=None, page_token=None):
     """
     Busca lugares usando a Google Places Text Search API.
+
+    Retorna (lugares, PageCursor da página seguinte ou None). Com page_token (o PageCursor
+    de uma busca anterior), busca essa página: do cache, pelo next_page_token se ainda
+    válido, ou refazendo ao vivo as páginas anteriores para obter um token novo. Como a
+    1ª página, as seguintes são cacheadas sem o token, por (parâmetros, página).
     """
     params = {
         "query": query,
         "key": GOOGLE_API_KEY,
         "language": "pt-BR"
     }
-    
+
     if location_bias:
         params["locationbias"] = location_bias
 
@@ -87,312 +247,896 @@ def search_places(query, location_bias=None, place_types=None, min_price=None, m
     if max_price is not None:
         params["maxprice"] = max_price
 
-    print(f"DEBUG: Enviando query para Google Places API: '{query}' com params: {params}")
-    response = requests.get(PLACES_API_BASE_URL, params=params)
-    data = response.json()
-    
-    if data['status'] == 'OK':
-        print(f"DEBUG: Search for '{query}' returned {len(data['results'])} results.")
-        return data['results']
-    else:
-        print(f"Erro ao buscar lugares (query: '{query}'): {data.get('error_message', data['status'])}")
-        return []
+    logger.debug("Enviando query para a Google Places API: '%s'", query,
+                 extra={"dados": {"max_price": max_price, "pagina": page_token.pagina if page_token else 1}})
+    if page_token is None:
+        data = api_cache.get(PLACES_API_BASE_URL, params)
+        if data is not None:
+            return places_page(query, data, 1, ao_vivo=False)
+        return places_page(query, fetch_google(PLACES_API_BASE_URL, params), 1)
 
-@app.route('/api/hello', methods=['GET'])
-def hello_world():
-    return jsonify(message="Backend Flask está rodando!")
+    params_pagina = {**params, "pagina": page_token.pagina}
+    data = api_cache.get(PLACES_API_BASE_URL, params_pagina)
+    if data is not None:
+        return places_page(query, data, page_token.pagina, ao_vivo=False)
+    cursor = page_token
+    if not cursor.valido():
+        cursor, page_token.renovacoes = renew_page_cursor(query, params, cursor.pagina)
+        if cursor is None:
+            return [], None
+    data = fetch_page(cursor)
+    if data.get('status') in CACHEABLE_STATUSES:
+        api_cache.set(PLACES_API_BASE_URL, params_pagina, without_page_token(data))
+    return places_page(query, data, cursor.pagina)
 
-@app.route('/api/generate_roteiro', methods=['POST'])
-def generate_roteiro():
-    print("DEBUG: Requisição para generate_roteiro recebida.")
-    data = request.json
-    destino = data.get('destino', '').lower()
-    data_inicio_str = data.get('dataInicio')
-    data_fim_str = data.get('dataFim')
-    orcamento_usuario = float(data.get('orcamento'))
-    tipo_viajante = data.get('tipoViajante')
-    interesses_usuario = data.get('interesses', [])
-    print(f"DEBUG: Destino: '{destino}', Interesses Selecionados: {interesses_usuario}, Orçamento: {orcamento_usuario}, Tipo Viajante: {tipo_viajante}")
+def indexed_coordinates(destino, geocodificar):
+    """Coordenadas do destino vindas do índice local, se frescas, ou de geocodificar (gravadas no índice)."""
+    coords = place_index.get_coordinates(destino) if place_index else None
+    if coords is None:
+        coords = geocodificar(destino)
+        if coords and place_index:
+            place_index.set_coordinates(destino, coords)
+    return coords
 
-    if not GOOGLE_API_KEY:
-        return jsonify({"mensagem": "Erro: Chave de API do Google não configurada no backend."}), 500
-    
+def indexed_search(destino, buscar):
+    """
+    Envolve a função de busca para responder do índice local as páginas já coletadas e
+    ainda frescas; as demais vão à API e o resultado (se não vazio) é gravado no índice.
+    """
+    if place_index is None:
+        return buscar
+
+    def buscar_com_indice(query, location_bias=None, page_token=None, **kwargs):
+        pagina = page_token.pagina if page_token else 1
+        max_price = kwargs.get('max_price')
+        registro = place_index.get_query(destino, query, max_price, pagina)
+        if registro is not None:
+            lugares, mais_paginas = registro
+            if not mais_paginas:
+                return lugares, None
+            return lugares, PageCursor(pagina + 1)
+        if page_token:
+            kwargs["page_token"] = page_token
+        lugares, proxima = buscar(query, location_bias=location_bias, **kwargs)
+        if lugares:
+            place_index.store_query(destino, query, max_price, lugares, pagina, mais_paginas=proxima is not None)
+        return lugares, proxima
+    return buscar_com_indice
+
+def take_wave(plano, restantes):
+    """
+    Separa de restantes a próxima onda de até PLACES_MAX_CONCURRENCY páginas, cobrando uma
+    chamada do orçamento do plano por página; as que não cabem são puladas e a consulta
+    fica marcada. Retorna (onda, restantes).
+    """
+    onda = []
+    while restantes and len(onda) < PLACES_MAX_CONCURRENCY:
+        (consulta, cursor), restantes = restantes[0], restantes[1:]
+        if plano.chamadas + 1 > plano.orcamento:
+            consulta.paginas_fora_do_orcamento = True
+            continue
+        plano.chamadas += 1
+        onda.append((consulta, cursor))
+    return onda, restantes
+
+def fetch_wave(executor, plano, onda, rodada, buscar, location_bias, tempo_restante, on_page):
+    """
+    Busca em paralelo as páginas (consulta, PageCursor ou None) da onda e retorna
+    (páginas, erro de quota ou None), com (lugares, PageCursor seguinte) de cada página na
+    ordem da onda, ou None se ela falhou ou não chegou em tempo_restante segundos. O
+    status das consultas e as falhas ficam no plano; on_page(consulta) é chamada a cada
+    página concluída.
+    """
+    def buscar_pagina(consulta, cursor):
+        with span("consulta", query=consulta.query, pagina=rodada):
+            return buscar(consulta.query, location_bias=location_bias,
+                          **consulta.kwargs, **({"page_token": cursor} if cursor else {}))
+
+    # Cada página roda com uma cópia do contexto, para entrar no perfil da requisição
+    futures = {
+        executor.submit(contextvars.copy_context().run, buscar_pagina, consulta, cursor): indice
+        for indice, (consulta, cursor) in enumerate(onda)
+    }
+    paginas = [None] * len(onda)
+    erro_quota = None
+    try:
+        for future in as_completed(futures, timeout=tempo_restante):
+            consulta, cursor = onda[futures[future]]
+            try:
+                lugares, proxima = future.result()
+            except Exception as e:
+                if isinstance(e, GoogleQuotaError):
+                    erro_quota = e
+                plano.paginas_com_falha += 1
+                if rodada == 1:
+                    consulta.status = "erro"
+                logger.warning("Erro ao buscar lugares (query: '%s', página %d): %s", consulta.query, rodada, e)
+            else:
+                consulta.status = "executada"
+                consulta.resultados += len(lugares)
+                consulta.paginas = rodada
+                paginas[futures[future]] = (lugares, proxima)
+            if rodada > 1:
+                plano.paginas_extras += 1
+                plano.renovacoes_de_token += cursor.renovacoes
+            on_page(consulta)
+    except FuturesTimeoutError:
+        for (consulta, _), pagina in zip(onda, paginas):
+            if consulta.status == "planejada":
+                consulta.status = "timeout"
+            if pagina is None:
+                plano.paginas_com_falha += 1
+        logger.warning("Páginas da rodada %d excederam o tempo limite de %ss e foram descartadas.", rodada, PLACES_COLLECTION_TIMEOUT)
+    return paginas, erro_quota
+
+def iter_places(plano, location_bias=None, on_progress=None, buscar=None, relevante=None):
+    """
+    Gerador que entrega, sem repetir place_id e em ordem determinística, os lugares das
+    consultas do plano até atingir o alvo de candidatos (lugares aprovados por relevante),
+    o orçamento ou PLACES_COLLECTION_TIMEOUT. buscar substitui search_places; on_progress
+    recebe um evento a cada página concluída.
+    """
+    buscar = buscar or search_places
+    relevante = relevante or (lambda lugar: True)
+    consultas = plano.executaveis
+    if not consultas:
+        return
+
+    prazo = time.monotonic() + PLACES_COLLECTION_TIMEOUT
+    executor = ThreadPoolExecutor(max_workers=min(PLACES_MAX_CONCURRENCY, len(consultas)))
+    place_ids = set()
+    relevantes = 0
+    concluidas = 0
+    erro_quota = None
+
+    def pagina_concluida(consulta, rodada):
+        nonlocal concluidas
+        if rodada == 1:
+            concluidas += 1
+        if on_progress:
+            on_progress({
+                "etapa": "coleta",
+                "consulta": consulta.query,
+                "pagina": rodada,
+                "consultas_concluidas": concluidas,
+                "consultas_total": len(consultas),
+                "candidatos": len(place_ids),
+                "relevantes": relevantes,
+            })
+
+    # Rodadas: a 1ª página de cada consulta, depois a 2ª das que têm página seguinte, e
+    # assim por diante. Cada rodada anda em ondas, e a próxima onda só é buscada quando o
+    # consumidor pede mais lugares e o alvo ainda não foi atingido.
+    paginas = [(consulta, None) for consulta in consultas]
+    parar = False
+    try:
+        for rodada in range(1, PLACES_MAX_PAGES + 1):
+            if not paginas or parar:
+                break
+            proximas = []
+            restantes = paginas
+            while restantes:
+                if relevantes >= plano.alvo_candidatos:
+                    for consulta, _ in restantes:
+                        if consulta.status == "planejada":
+                            consulta.status = "pulada_alvo_atingido"
+                    parar = True
+                    break
+                tempo_restante = prazo - time.monotonic()
+                if tempo_restante <= 0:
+                    for consulta, _ in restantes:
+                        if consulta.status == "planejada":
+                            consulta.status = "timeout"
+                    plano.paginas_com_falha += len(restantes)
+                    parar = True
+                    break
+
+                onda, restantes = take_wave(plano, restantes)
+                if not onda:
+                    break
+                paginas_da_onda, erro = fetch_wave(
+                    executor, plano, onda, rodada, buscar, location_bias, tempo_restante,
+                    lambda consulta, rodada=rodada: pagina_concluida(consulta, rodada),
+                )
+                erro_quota = erro or erro_quota
+
+                for (consulta, _), pagina in zip(onda, paginas_da_onda):
+                    if pagina is None:
+                        continue
+                    lugares, proxima = pagina
+                    if proxima:
+                        proximas.append((consulta, proxima))
+                    for lugar in lugares:
+                        place_id = lugar.get('place_id')
+                        if not place_id or place_id in place_ids:
+                            continue
+                        place_ids.add(place_id)
+                        plano.candidatos_coletados = len(place_ids)
+                        if relevante(lugar):
+                            relevantes += 1
+                            plano.candidatos_relevantes = relevantes
+                        yield lugar
+            paginas = proximas
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Sem nenhum resultado por causa da quota, o roteiro sairia vazio: melhor sinalizar o erro.
+    if erro_quota and not place_ids:
+        raise erro_quota
+
+def calc_max_price_level(orcamento_usuario):
+    """Converte o orçamento do usuário no nível de preço máximo da Places API."""
+    if orcamento_usuario < 600:
+        return 1
+    elif orcamento_usuario < 2000:
+        return 2
+    elif orcamento_usuario < 4000:
+        return 3
+    return 4
+
+class RoteiroError(Exception):
+    """Erro do pipeline de geração que vira uma resposta {"mensagem"} com o status HTTP dado."""
+
+    def __init__(self, mensagem, status):
+        super().__init__(mensagem)
+        self.mensagem = mensagem
+        self.status = status
+
+def plan_for_request(data):
+    """
+    Valida os parâmetros de uma requisição e monta o seu plano de consultas.
+
+    Os interesses são ordenados para que requisições equivalentes gerem o mesmo plano, e
+    a semente dos sorteios vem do campo "seed" ou, sem ele, dos parâmetros normalizados.
+    Retorna (contexto, None) em caso de sucesso ou (None, (mensagem, status_http)).
+    """
+    destino = " ".join(data.get('destino', '').lower().split())
+    tipo_viajante = data.get('tipoViajante')
+    interesses_usuario = data.get('interesses') or []
+    if not isinstance(interesses_usuario, list) or not all(isinstance(i, str) for i in interesses_usuario):
+        return None, ("Interesses devem ser uma lista de textos.", 400)
+    interesses_usuario = sorted(interesses_usuario)
     try:
-        data_inicio = datetime.strptime(data_inicio_str, '%Y-%m-%d')
-        data_fim = datetime.strptime(data_fim_str, '%Y-%m-%d')
+        orcamento_usuario = float(data.get('orcamento'))
+        data_inicio = datetime.strptime(data.get('dataInicio'), '%Y-%m-%d')
+        data_fim = datetime.strptime(data.get('dataFim'), '%Y-%m-%d')
         dias_viagem = (data_fim - data_inicio).days + 1
+        seed = int(data['seed']) if data.get('seed') is not None else None
     except (ValueError, TypeError):
-        return jsonify({"mensagem": "Formato de data inválido."}), 400
+        return None, ("Formato de data, orçamento ou seed inválido.", 400)
+    if dias_viagem < 1:
+        return None, ("A data de fim deve ser igual ou posterior à data de início.", 400)
 
-    coords = get_coordinates(destino)
+    max_price_level = calc_max_price_level(orcamento_usuario)
+    agrupar_por_regiao = bool(data.get('agruparPorRegiao', True))
+    # Tudo o que influencia o roteiro gerado: chave do cache de roteiros e base da semente
+    parametros_normalizados = {
+        "destino": destino,
+        "dias_viagem": dias_viagem,
+        "max_price_level": max_price_level,
+        "tipo_viajante": tipo_viajante or "",
+        "interesses": ",".join(interesses_usuario),
+        "agrupar_por_regiao": agrupar_por_regiao,
+        "seed": "" if seed is None else seed,
+    }
+    if seed is None and ROTEIRO_DETERMINISTIC:
+        seed = int(make_cache_key("roteiro", parametros_normalizados)[:16], 16)
+
+    plano = build_query_plan(
+        destino, interesses_usuario, tipo_viajante, max_price_level, dias_viagem,
+        pesos_viajante=TIPO_VIAJANTE_PESOS.get(tipo_viajante),
+        orcamento=PLACES_QUERY_BUDGET,
+        fator_candidatos=PLACES_CANDIDATE_FACTOR,
+    )
+    return {
+        "destino": destino,
+        "tipo_viajante": tipo_viajante,
+        "interesses": interesses_usuario,
+        "orcamento": orcamento_usuario,
+        "dias_viagem": dias_viagem,
+        "max_price_level": max_price_level,
+        "plano": plano,
+        "agrupar_por_regiao": agrupar_por_regiao,
+        "seed": seed,
+        "parametros_normalizados": parametros_normalizados,
+    }, None
+
+def collect_candidates(contexto, on_progress=None):
+    """
+    Geocodifica o destino, executa o plano de consultas e pontua os lugares encontrados.
+
+    Retorna os candidatos com score suficiente, ordenados por score; lança RoteiroError
+    quando não há como montar um roteiro. on_progress (se dado) recebe um evento por etapa
+    e por consulta concluída. Se o contexto tiver uma "coleta" (batch.SharedCollection),
+    geocodificação e buscas passam por ela.
+    """
+    destino = contexto["destino"]
+    interesses_usuario = contexto["interesses"]
+    plano = contexto["plano"]
+    on_progress = on_progress or (lambda evento: None)
+    coleta = contexto.get("coleta")
+
+    on_progress({"etapa": "geocodificacao", "destino": destino})
+    try:
+        with span("geocodificacao"):
+            coords = indexed_coordinates(destino, coleta.get_coordinates if coleta else get_coordinates)
+    except GoogleApiError as e:
+        logger.error("Erro ao obter coordenadas para '%s': %s", destino, e)
+        raise RoteiroError("O serviço de mapas está temporariamente indisponível. Tente novamente em instantes.", 503)
     if not coords:
-        return jsonify({"mensagem": f"Não foi possível encontrar coordenadas para o destino '{destino}'."}), 404
+        raise RoteiroError(f"Não foi possível encontrar coordenadas para o destino '{destino}'.", 404)
 
     location_bias_str = f"point:{coords}"
 
-    max_price_level = 4
-    if orcamento_usuario < 600:
-        max_price_level = 1
-    elif orcamento_usuario < 2000:
-        max_price_level = 2
-    elif orcamento_usuario < 4000:
-        max_price_level = 3
-    print(f"DEBUG: Max Price Level Calculado (baseado no orçamento): {max_price_level}")
-    
     # --- Coleta de Pontos de Interesse da Google Places API ---
-    all_places_from_api = []
-    
-    # Priorizar buscas específicas baseadas nos interesses do usuário
-    for interesse in interesses_usuario:
-        print(f"DEBUG: Processando interesse: '{interesse}'")
-        if interesse == "praias":
-            all_places_from_api.extend(search_places(f"praias em {destino}", location_bias=location_bias_str, max_price=max_price_level))
-            all_places_from_api.extend(search_places(f"orla de {destino}", location_bias=location_bias_str, max_price=max_price_level))
-            all_places_from_api.extend(search_places(f"piscinas naturais em {destino}", location_bias=location_bias_str, max_price=max_price_level))
-        elif interesse == "museus":
-            print(f"DEBUG: Iniciando busca por museus para '{destino}' (sem restrição de preço inicial)") # NOVO LOG
-            # REMOVIDO: max_price=max_price_level para Museus
-            all_places_from_api.extend(search_places(f"museu {destino}", location_bias=location_bias_str)) 
-            all_places_from_api.extend(search_places(f"galeria de arte {destino}", location_bias=location_bias_str))
-            all_places_from_api.extend(search_places(f"centro cultural {destino}", location_bias=location_bias_str))
-            all_places_from_api.extend(search_places(f"sítio histórico {destino}", location_bias=location_bias_str))
-            all_places_from_api.extend(search_places(f"casa de cultura {destino}", location_bias=location_bias_str))
-            all_places_from_api.extend(search_places(f"atrações culturais em {destino}", location_bias=location_bias_str))
-        elif interesse == "gastronomia":
-            all_places_from_api.extend(search_places(f"melhores restaurantes em {destino}", location_bias=location_bias_str, max_price=max_price_level))
-            all_places_from_api.extend(search_places(f"bares e restaurantes em {destino}", location_bias=location_bias_str, max_price=max_price_level))
-            all_places_from_api.extend(search_places(f"cafes em {destino}", location_bias=location_bias_str, max_price=max_price_level))
-            all_places_from_api.extend(search_places(f"padarias e docerias em {destino}", location_bias=location_bias_str, max_price=max_price_level))
-        elif interesse == "natureza":
-            all_places_from_api.extend(search_places(f"parques naturais em {destino}", location_bias=location_bias_str, max_price=max_price_level))
-            all_places_from_api.extend(search_places(f"reservas ecológicas em {destino}", location_bias=location_bias_str, max_price=max_price_level))
-            all_places_from_api.extend(search_places(f"trilhas em {destino}", location_bias=location_bias_str, max_price=max_price_level))
-            all_places_from_api.extend(search_places(f"jardins botânicos em {destino}", location_bias=location_bias_str, max_price=max_price_level))
-        elif interesse == "historia":
-            print(f"DEBUG: Iniciando busca por história para '{destino}' (sem restrição de preço inicial)") # NOVO LOG
-            # REMOVIDO: max_price=max_price_level para Historia
-            all_places_from_api.extend(search_places(f"pontos históricos em {destino}", location_bias=location_bias_str))
-            all_places_from_api.extend(search_places(f"igrejas históricas em {destino}", location_bias=location_bias_str))
-            all_places_from_api.extend(search_places(f"monumentos históricos em {destino}", location_bias=location_bias_str))
-        else:
-            for place_type in INTERESTS_TO_PLACE_TYPES.get(interesse, []):
-                query_str = f"{place_type.replace('_', ' ')} em {destino}"
-                all_places_from_api.extend(search_places(query_str, location_bias=location_bias_str, max_price=max_price_level))
-    
-    # Buscas gerais para o destino
-    print(f"DEBUG: Iniciando buscas gerais para '{destino}' (sem restrição de preço inicial)") # NOVO LOG
-    # REMOVIDO: max_price=max_price_level para buscas gerais
-    all_places_from_api.extend(search_places(f"atrações turísticas em {destino}", location_bias=location_bias_str))
-    all_places_from_api.extend(search_places(f"melhores lugares para visitar em {destino}", location_bias=location_bias_str))
-    all_places_from_api.extend(search_places(f"pontos turísticos em {destino}", location_bias=location_bias_str))
-
-    # Remove duplicatas
-    unique_places_map = {place['place_id']: place for place in all_places_from_api if 'place_id' in place}
-    pontos_disponiveis = list(unique_places_map.values())
-    print(f"DEBUG: Total de pontos únicos coletados da API: {len(unique_places_map)}")
+    # A coleta para ao reunir alvo_candidatos lugares que passariam do score mínimo
+    on_progress({"etapa": "coleta", "consultas_concluidas": 0, "consultas_total": len(plano.executaveis), "candidatos": 0, "relevantes": 0})
+    try:
+        buscar = indexed_search(destino, coleta.search_places if coleta else search_places)
+        relevante = relevance_filter(interesses_usuario, contexto["tipo_viajante"], contexto["max_price_level"])
+        with span("coleta") as dados_coleta:
+            pontos_disponiveis = list(iter_places(plano, location_bias_str, on_progress=on_progress, buscar=buscar, relevante=relevante))
+            dados_coleta["lugares"] = len(pontos_disponiveis)
+    except GoogleQuotaError as e:
+        logger.error("Erro na coleta de lugares para '%s': %s", destino, e)
+        raise RoteiroError("Limite de consultas ao Google atingido. Tente novamente em instantes.", 503)
+    logger.debug("Plano de consultas para '%s'", destino, extra={"dados": plano.resumo()})
 
     if not pontos_disponiveis:
-        print(f"DEBUG: Nenhum ponto disponível após a coleta inicial da API para {destino} com os interesses {interesses_usuario}.")
-        return jsonify({"mensagem": f"Não foram encontrados pontos de interesse para '{destino}' com os critérios fornecidos. Tente interesses diferentes ou um orçamento maior."}), 404
-    
-    pontos_para_roteiro_com_scores = []
-    for place in pontos_disponiveis:
-        nome_ponto = place.get('name', 'Ponto Desconhecido')
-        google_types = place.get('types', [])
-        price_level = place.get('price_level', None)
-        
-        price_level_text = PRICE_LEVEL_MAP.get(price_level, "Não Informado")
-        
-        custo_estimado_inferido = "desconhecido"
-        if price_level is not None:
-            if price_level >= 3:
-                custo_estimado_inferido = "alto"
-            elif price_level == 2:
-                custo_estimado_inferido = "medio"
-            elif price_level <= 1:
-                custo_estimado_inferido = "baixo"
-
-        interesses_inferidos = []
-        for interesse_key, google_types_list in INTERESTS_TO_PLACE_TYPES.items():
-            if any(gt in google_types for gt in google_types_list):
-                interesses_inferidos.append(interesse_key)
-        
-        score = 0
-        
-        # SUPER IMPULSO para correspondências diretas com os interesses do usuário
-        for interesse_key in interesses_usuario:
-            if interesse_key in INTERESTS_TO_PLACE_TYPES:
-                if any(gt in google_types for gt in INTERESTS_TO_PLACE_TYPES[interesse_key]):
-                    score += 200
-            
-        # Pontuação aprimorada: Maior peso para tipo de viajante
-        if tipo_viajante and tipo_viajante in TIPO_VIAJANTE_PESOS:
-            for google_type_peso, peso in TIPO_VIAJANTE_PESOS[tipo_viajante].items():
-                if google_type_peso in google_types:
-                    score += peso
-
-        # Penalidade se o preço for muito acima do orçamento do usuário
-        # Esta penalidade continua a ser aplicada na fase de pontuação,
-        # mas só depois que os lugares foram coletados SEM a restrição de preço inicial.
-        if price_level is not None and price_level > max_price_level:
-            score = max(0, score - (price_level - max_price_level) * 10)
-
-        duracao_horas_inferida = 2
-        if any(t in google_types for t in ["museum", "art_gallery", "historic_site"]):
-            duracao_horas_inferida = random.choice([2, 3])
-        if any(t in google_types for t in ["shopping_mall", "amusement_park", "park", "zoo"]):
-            duracao_horas_inferida = random.choice([3, 4, 5])
-        if any(t in google_types for t in ["beach", "natural_feature"]):
-            duracao_horas_inferida = random.choice([3, 4])
-        if any(t in google_types for t in ["restaurant", "food", "bar", "night_club"]):
-            duracao_horas_inferida = random.choice([1, 2])
-
-        melhor_periodo_dia_inferido = ["manha", "tarde"]
-        if any(t in google_types for t in ["night_club", "bar"]):
-            melhor_periodo_dia_inferido = ["noite"]
-        if any(t in google_types for t in ["restaurant", "food", "cafe"]):
-            melhor_periodo_dia_inferido = random.choice([["manha", "tarde"], ["tarde", "noite"]])
-        if any(t in google_types for t in ["restaurant", "food"]) and "dinner" in google_types:
-             melhor_periodo_dia_inferido.append("noite")
-        
-        if any(t in google_types for t in ["amusement_park"]):
-            melhor_periodo_dia_inferido = ["dia_inteiro"]
-
-        # Pontuação base mínima para garantir que o item seja considerado
-        if score == 0:
-            score = 10
-        elif score < 25:
-            score = 25
-
-
-        pontos_para_roteiro_com_scores.append({
-            "ponto": {
-                "nome": nome_ponto,
-                "interesses": interesses_inferidos,
-                "duracao_horas": duracao_horas_inferida,
-                "custo_estimado": custo_estimado_inferido,
-                "custo_detalhado": price_level_text,
-                "ideal_para": google_types,
-                "melhor_periodo_dia": melhor_periodo_dia_inferido,
-                "place_id": place.get('place_id')
-            },
-            "score": score
-        })
-
-    # Filtrar pontos com score muito baixo
-    pontos_filtrados_por_score = [item for item in pontos_para_roteiro_com_scores if item['score'] >= 30] 
-    print(f"DEBUG: Pontos após filtragem por score (>=30): {len(pontos_filtrados_por_score)}")
-    
+        logger.info("Nenhum ponto disponível após a coleta para '%s' com os interesses %s.", destino, interesses_usuario)
+        raise RoteiroError(f"Não foram encontrados pontos de interesse para '{destino}' com os critérios fornecidos. Tente interesses diferentes ou um orçamento maior.", 404)
+
+    on_progress({"etapa": "pontuacao", "candidatos": len(pontos_disponiveis)})
+    # Com semente, os sorteios de duração e período são reprodutíveis
+    rng = random.Random(contexto["seed"]) if contexto["seed"] is not None else random
+    with span("pontuacao", lugares=len(pontos_disponiveis)) as dados_pontuacao:
+        pontos_para_roteiro_com_scores = score_places(
+            pontos_disponiveis, interesses_usuario, contexto["tipo_viajante"], contexto["max_price_level"], rng=rng
+        )
+
+        # Filtrar pontos com score muito baixo
+        pontos_filtrados_por_score = [item for item in pontos_para_roteiro_com_scores if item.score >= SCORE_MINIMO]
+        # Ordenar por score
+        pontos_filtrados_por_score.sort(key=lambda x: x.score, reverse=True)
+        dados_pontuacao["relevantes"] = len(pontos_filtrados_por_score)
+
     if not pontos_filtrados_por_score:
-        print(f"DEBUG: Nenhum ponto disponível após a filtragem por score (mínimo 30) para {destino} com os interesses {interesses_usuario}.")
-        return jsonify({"mensagem": f"Não foram encontrados pontos de interesse relevantes para '{destino}' com os critérios fornecidos (após pontuação). Tente interesses diferentes ou um orçamento maior."}), 404
+        logger.info("Nenhum ponto com score mínimo %d para '%s' com os interesses %s.", SCORE_MINIMO, destino, interesses_usuario)
+        raise RoteiroError(f"Não foram encontrados pontos de interesse relevantes para '{destino}' com os critérios fornecidos (após pontuação). Tente interesses diferentes ou um orçamento maior.", 404)
 
-    # Ordenar por score
-    pontos_filtrados_por_score.sort(key=lambda x: x["score"], reverse=True)
-    
-    pontos_para_roteiro = pontos_filtrados_por_score
+    return pontos_filtrados_por_score
 
-    # --- Geração do Roteiro ---
-    roteiro_gerado = []
-    atividades_usadas_geral = set()
-
-    for dia_num in range(1, dias_viagem + 1):
-        pontos_disponiveis_hoje = [item for item in pontos_para_roteiro if item['ponto']['place_id'] not in atividades_usadas_geral]
-        pontos_disponiveis_hoje.sort(key=lambda x: x['score'], reverse=True)
-
-        manha_slot = None
-        tarde_slot = None
-        noite_slot = None
-
-        # Tentar preencher atividades de "dia_inteiro" primeiro
-        for item in pontos_disponiveis_hoje:
-            ponto = item['ponto']
-            if "dia_inteiro" in ponto.get('melhor_periodo_dia', []) and not manha_slot and not tarde_slot and ponto['place_id'] not in atividades_usadas_geral:
-                manha_slot = ponto
-                tarde_slot = {"nome": "marcador_ocupado_dia_inteiro"}
-                atividades_usadas_geral.add(ponto['place_id'])
-                break
-        
-        # Preencher slots restantes por prioridade e score
-        
-        # Noite
-        for item in pontos_disponiveis_hoje:
-            ponto = item['ponto']
-            if ponto['place_id'] not in atividades_usadas_geral and "noite" in ponto.get('melhor_periodo_dia', []) and not noite_slot:
-                noite_slot = ponto
-                atividades_usadas_geral.add(ponto['place_id'])
-                break
-        
-        # Manhã
-        for item in pontos_disponiveis_hoje:
-            ponto = item['ponto']
-            if ponto['place_id'] not in atividades_usadas_geral and "manha" in ponto.get('melhor_periodo_dia', []) and not manha_slot:
-                manha_slot = ponto
-                atividades_usadas_geral.add(ponto['place_id'])
-                break
-        
-        # Tarde
-        for item in pontos_disponiveis_hoje:
-            ponto = item['ponto']
-            if ponto['place_id'] not in atividades_usadas_geral and "tarde" in ponto.get('melhor_periodo_dia', []) and not tarde_slot:
-                tarde_slot = ponto
-                atividades_usadas_geral.add(ponto['place_id'])
-                break
+def iter_roteiro_days(contexto, pontos_para_roteiro):
+    """
+    Agenda e renderiza os dias um a um, entregando cada dia assim que fica pronto.
+
+    Os tempos de agendamento e de renderização são somados entre os dias e registrados
+    ao fim como as etapas "agendamento" e "renderizacao".
+    """
+    dias_viagem = contexto["dias_viagem"]
+    grupos, grupos_por_dia = None, None
+    if SPATIAL_CLUSTERING and contexto["agrupar_por_regiao"]:
+        with span("agrupamento", pontos=len(pontos_para_roteiro)):
+            grupos, grupos_por_dia = cluster_days(pontos_para_roteiro, dias_viagem)
+
+    dias = iter_days(pontos_para_roteiro, dias_viagem, grupos, grupos_por_dia)
+    agendamento = 0.0
+    renderizacao = 0.0
+    dia_num = 0
+    while True:
+        inicio = time.perf_counter()
+        dia = next(dias, None)
+        agendamento += time.perf_counter() - inicio
+        if dia is None:
+            break
+        dia_num += 1
+        inicio = time.perf_counter()
+        dia_renderizado = render_day(dia_num, dia, day_distances_km([dia])[0])
+        renderizacao += time.perf_counter() - inicio
+        yield dia_renderizado
+    record_span("agendamento", agendamento, dias=dia_num)
+    record_span("renderizacao", renderizacao, dias=dia_num)
+
+# Formato do link do Google Maps
+MAPS_LINK_BASE = "http://maps.google.com/?q=place_id:"
+
+def render_day(dia_num, dia, distancia_km):
+    """Converte um dia agendado no objeto {"dia", "atividades", "distancia_estimada_km"} da resposta."""
+    manha_slot = dia["manha"]
+    tarde_slot = dia["tarde"]
+    noite_slot = dia["noite"]
 
-        # Preencher slots vazios com qualquer ponto restante de alto score
-        pontos_restantes_para_dia = [item for item in pontos_disponiveis_hoje if item['ponto']['place_id'] not in atividades_usadas_geral]
-        pontos_restantes_para_dia.sort(key=lambda x: x['score'], reverse=True)
-
-        for item in pontos_restantes_para_dia:
-            ponto = item['ponto']
-            if not manha_slot and ponto['duracao_horas'] <= 3:
-                manha_slot = ponto
-                atividades_usadas_geral.add(ponto['place_id'])
-            elif not tarde_slot and ponto['duracao_horas'] <= 4:
-                tarde_slot = ponto
-                atividades_usadas_geral.add(ponto['place_id'])
-            elif not noite_slot and ponto['duracao_horas'] <= 3:
-                noite_slot = ponto
-                atividades_usadas_geral.add(ponto['place_id'])
-
-        final_activities = []
-
-        # Formato do link do Google Maps
-        MAPS_LINK_BASE = "http://maps.google.com/?q=place_id:" # CORREÇÃO FINAL NO LINK DO GOOGLE MAPS
-
-        if manha_slot and manha_slot["nome"] != "marcador_ocupado_dia_inteiro":
-            link = f"<a href='{MAPS_LINK_BASE}{manha_slot['place_id']}' target='_blank' rel='noopener noreferrer'>{manha_slot['nome']}</a>" if manha_slot.get('place_id') else manha_slot['nome']
-            final_activities.append(f"8h da Manhã: {link} ({manha_slot['duracao_horas']}h, {manha_slot['custo_detalhado']})")
-        
-        if tarde_slot and tarde_slot["nome"] != "marcador_ocupado_dia_inteiro":
-            link = f"<a href='{MAPS_LINK_BASE}{tarde_slot['place_id']}' target='_blank' rel='noopener noreferrer'>{tarde_slot['nome']}</a>" if tarde_slot.get('place_id') else tarde_slot['nome']
-            final_activities.append(f"13h da Tarde: {link} ({tarde_slot['duracao_horas']}h, {tarde_slot['custo_detalhado']})")
-        
-        if noite_slot:
-            link = f"<a href='{MAPS_LINK_BASE}{noite_slot['place_id']}' target='_blank' rel='noopener noreferrer'>{noite_slot['nome']}</a>" if noite_slot.get('place_id') else noite_slot['nome']
-            final_activities.append(f"19h da Noite: {link} ({noite_slot['duracao_horas']}h, {noite_slot['custo_detalhado']})")
-        
-        if not final_activities:
-            final_activities.append("Nenhuma atividade específica sugerida para este dia. Explore por conta própria!")
-
-
-        roteiro_gerado.append({
-            "dia": dia_num,
-            "atividades": final_activities
-        })
-
-    sugestao_orcamento = "Seu orçamento parece adequado para as atividades sugeridas."
+    final_activities = []
+
+    if manha_slot:
+        link = f"<a href='{MAPS_LINK_BASE}{manha_slot.place_id}' target='_blank' rel='noopener noreferrer'>{manha_slot.nome}</a>" if manha_slot.place_id else manha_slot.nome
+        final_activities.append(f"8h da Manhã: {link} ({manha_slot.duracao_horas}h, {manha_slot.custo_detalhado})")
+
+    if tarde_slot:
+        link = f"<a href='{MAPS_LINK_BASE}{tarde_slot.place_id}' target='_blank' rel='noopener noreferrer'>{tarde_slot.nome}</a>" if tarde_slot.place_id else tarde_slot.nome
+        final_activities.append(f"13h da Tarde: {link} ({tarde_slot.duracao_horas}h, {tarde_slot.custo_detalhado})")
+
+    if noite_slot:
+        link = f"<a href='{MAPS_LINK_BASE}{noite_slot.place_id}' target='_blank' rel='noopener noreferrer'>{noite_slot.nome}</a>" if noite_slot.place_id else noite_slot.nome
+        final_activities.append(f"19h da Noite: {link} ({noite_slot.duracao_horas}h, {noite_slot.custo_detalhado})")
+
+    if not final_activities:
+        final_activities.append("Nenhuma atividade específica sugerida para este dia. Explore por conta própria!")
+
+    return {
+        "dia": dia_num,
+        "atividades": final_activities,
+        "distancia_estimada_km": round(distancia_km, 1) if distancia_km is not None else None
+    }
+
+def budget_suggestion(max_price_level):
     if max_price_level == 4:
-        sugestao_orcamento = "Com seu orçamento, você tem muitas opções de luxo e atividades exclusivas!"
+        return "Com seu orçamento, você tem muitas opções de luxo e atividades exclusivas!"
     elif max_price_level == 3:
-        sugestao_orcamento = "Ótimo orçamento! Você poderá aproveitar muitas experiências sem se preocupar tanto."
+        return "Ótimo orçamento! Você poderá aproveitar muitas experiências sem se preocupar tanto."
     elif max_price_level == 2:
-        sugestao_orcamento = "Seu orçamento médio permite uma boa variedade de atividades e conforto. Explore bem as opções!"
+        return "Seu orçamento médio permite uma boa variedade de atividades e conforto. Explore bem as opções!"
+    return "Com um orçamento mais restrito, priorize atividades gratuitas e econômicas. Há muitas opções charmosas!"
+
+def build_roteiro(contexto, on_event=None):
+    """
+    Executa o pipeline completo e retorna o corpo da resposta de generate_roteiro.
+
+    on_event (se dado) recebe os eventos do streaming: {"tipo": "progresso", ...} durante a
+    coleta, {"tipo": "dia", "dia": {...}} a cada dia agendado e {"tipo": "resumo", ...} ao fim.
+    """
+    on_event = on_event or (lambda evento: None)
+    pontos_para_roteiro = collect_candidates(contexto, on_progress=lambda evento: on_event({"tipo": "progresso", **evento}))
+    on_event({"tipo": "progresso", "etapa": "agendamento", "candidatos": len(pontos_para_roteiro)})
+
+    roteiro_gerado = []
+    for dia in iter_roteiro_days(contexto, pontos_para_roteiro):
+        roteiro_gerado.append(dia)
+        on_event({"tipo": "dia", "dia": dia})
+
+    sugestao_orcamento = budget_suggestion(contexto["max_price_level"])
+    on_event({"tipo": "resumo", "sugestao_orcamento": sugestao_orcamento, "total_dias": len(roteiro_gerado)})
+    return {"roteiro": roteiro_gerado, "sugestao_orcamento": sugestao_orcamento}
+
+def replay_events(resposta, on_event):
+    """Emite os eventos de streaming de um roteiro já pronto (vindo do cache)."""
+    for dia in resposta["roteiro"]:
+        on_event({"tipo": "dia", "dia": dia})
+    on_event({"tipo": "resumo", "sugestao_orcamento": resposta["sugestao_orcamento"], "total_dias": len(resposta["roteiro"])})
+
+def cached_roteiro(contexto):
+    """Entrada {"etag", "resposta"} do cache de roteiros para o contexto, ou None."""
+    if contexto["seed"] is None:
+        return None
+    return roteiro_cache.get(ROTEIRO_CACHE_ENDPOINT, contexto["parametros_normalizados"])
+
+def roteiro_with_cache(contexto, on_event=None):
+    """
+    Retorna (resposta, etag) do cache de roteiros ou, na falta, executando o pipeline.
+
+    Roteiros só são cacheáveis quando reprodutíveis (com semente) e completos: um roteiro
+    montado com páginas que falharam ou estouraram o tempo (numa instabilidade ou falta de
+    quota do Google) é entregue, mas não cacheado. Pedidos reprodutíveis
+    idênticos que chegam enquanto o mesmo roteiro está sendo gerado esperam por ele em vez
+    de repetir o pipeline. Num acerto do cache (ou ao receber o roteiro de outra
+    requisição), on_event recebe os eventos do roteiro pronto.
+    """
+    if contexto["seed"] is None:
+        resposta = build_roteiro(contexto, on_event=on_event)
+        return resposta, make_etag(resposta)
+
+    parametros = contexto["parametros_normalizados"]
+    em_cache = cached_roteiro(contexto)
+    if em_cache is not None:
+        if on_event:
+            replay_events(em_cache["resposta"], on_event)
+        return em_cache["resposta"], em_cache["etag"]
+
+    executou = []
+
+    def gerar():
+        executou.append(True)
+        resposta = build_roteiro(contexto, on_event=on_event)
+        etag = make_etag(resposta)
+        if contexto["plano"].completo:
+            roteiro_cache.set(ROTEIRO_CACHE_ENDPOINT, parametros, {"etag": etag, "resposta": resposta})
+        return resposta, etag
+
+    resposta, etag = roteiros_em_andamento.do(make_cache_key(ROTEIRO_CACHE_ENDPOINT, parametros), gerar)
+    if on_event and not executou:
+        replay_events(resposta, on_event)
+    return resposta, etag
+
+def make_etag(resposta):
+    corpo = json.dumps(resposta, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(corpo.encode('utf-8')).hexdigest()[:32]
+
+def etag_response(resposta, etag):
+    """Resposta JSON com ETag, ou 304 se o cliente já tem essa versão (If-None-Match)."""
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
     else:
-        sugestao_orcamento = "Com um orçamento mais restrito, priorize atividades gratuitas e econômicas. Há muitas opções charmosas!"
+        response = jsonify(resposta)
+    response.set_etag(etag)
+    return response
+
+def _rota():
+    return request.url_rule.rule if request.url_rule else "desconhecida"
+
+@app.before_request
+def start_request_metrics():
+    g.inicio_requisicao = time.perf_counter()
+    # Só as rotas de geração de roteiros são amostradas para perfis
+    if request.path.startswith('/api/generate_roteiro'):
+        g.perfil_token = profiler.start(_rota(), forcar=request.headers.get('X-Roteiro-Perfil') == '1')
+
+@app.after_request
+def record_request_metrics(response):
+    rota = _rota()
+    HTTP_REQUISICOES.inc(rota=rota, metodo=request.method, status=response.status_code)
+    HTTP_DURACAO.observe(time.perf_counter() - g.get('inicio_requisicao', time.perf_counter()), rota=rota)
+    profiler.finish(g.pop('perfil_token', None), response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request_profile(erro=None):
+    # Requisições que terminaram em exceção não passam por after_request
+    profiler.finish(g.pop('perfil_token', None), 500)
+
+@registry.collector
+def internal_metrics():
+    """Contadores que já existem nos caches, no índice, na coalescência e nos jobs."""
+    eventos, entradas = [], []
+    for nome, cache in (("api", api_cache), ("roteiros", roteiro_cache)):
+        stats = cache.stats()
+        entradas.append(({"cache": nome}, stats["entradas_memoria"]))
+        for endpoint, contadores in stats["endpoints"].items():
+            for evento, valor in contadores.items():
+                eventos.append(({"cache": nome, "endpoint": endpoint, "evento": evento}, valor))
+    yield "cache_eventos_total", "counter", "Acertos (memória e disco) e faltas dos caches por endpoint.", eventos
+    yield "cache_entradas_memoria", "gauge", "Entradas no nível em memória de cada cache.", entradas
+
+    coalescencia = []
+    for nome, voo in (("google", chamadas_em_andamento), ("roteiros", roteiros_em_andamento)):
+        stats = voo.stats()
+        coalescencia.append(({"tipo": nome, "resultado": "executada"}, stats["execucoes"]))
+        coalescencia.append(({"tipo": nome, "resultado": "compartilhada"}, stats["compartilhadas"]))
+    yield "coalescencia_total", "counter", "Trabalhos executados e compartilhados entre requisições simultâneas.", coalescencia
+
+    jobs = roteiro_jobs.stats()["jobs"]
+    yield "roteiro_jobs", "gauge", "Jobs do modo assíncrono por status.", [({"status": s}, n) for s, n in jobs.items()]
+
+    if place_index:
+        stats = place_index.stats()
+        yield "indice_lugares_consultas_total", "counter", "Páginas de consultas servidas pelo índice local ou ausentes nele.", [
+            ({"evento": "hit"}, stats["hits"]), ({"evento": "miss"}, stats["misses"])
+        ]
+        yield "indice_lugares_lugares", "gauge", "Lugares no índice local.", [({}, stats["lugares"])]
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Métricas do processo no formato de texto do Prometheus."""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/perfis', methods=['GET'])
+def metrics_profiles():
+    """Perfis (etapas com início e duração) das últimas requisições amostradas."""
+    return jsonify({"taxa_amostragem": profiler.taxa, "perfis": profiler.recent()})
+
+@app.route('/api/hello', methods=['GET'])
+def hello_world():
+    return jsonify(message="Backend Flask está rodando!")
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        "api": api_cache.stats(),
+        "roteiros": roteiro_cache.stats(),
+        "em_andamento": {"google": chamadas_em_andamento.stats(), "roteiros": roteiros_em_andamento.stats()},
+        "jobs": roteiro_jobs.stats(),
+        "indice_lugares": place_index.stats() if place_index else None,
+    })
+
+@app.route('/api/indice_lugares', methods=['GET'])
+def indice_lugares():
+    """Consulta o índice local: ?destino=...&tipo=museum&max_price=2&geohash=75cm (filtros opcionais)."""
+    if place_index is None:
+        return jsonify({"mensagem": "Índice de lugares desativado (PLACE_INDEX_PATH vazio)."}), 404
+    destino = " ".join(request.args.get('destino', '').lower().split())
+    if not destino:
+        return jsonify({"mensagem": "Informe o destino."}), 400
+    lugares = place_index.find_places(
+        destino,
+        tipo=request.args.get('tipo'),
+        max_price_level=request.args.get('max_price', type=int),
+        geohash_prefixo=request.args.get('geohash'),
+        limite=request.args.get('limite', 200, type=int),
+    )
+    return jsonify({"destino": destino, "lugares": lugares})
+
+@app.route('/api/plano_consultas', methods=['POST'])
+def plano_consultas():
+    """Retorna o plano de consultas de uma requisição, sem executá-lo."""
+    contexto, erro = plan_for_request(request.json or {})
+    if erro:
+        return jsonify({"mensagem": erro[0]}), erro[1]
+    return jsonify(contexto["plano"].to_dict())
+
+@app.route('/api/generate_roteiro', methods=['POST'])
+def generate_roteiro():
+    if not GOOGLE_API_KEY:
+        return jsonify({"mensagem": "Erro: Chave de API do Google não configurada no backend."}), 500
+
+    contexto, erro = plan_for_request(request.json or {})
+    if erro:
+        return jsonify({"mensagem": erro[0]}), erro[1]
+    logger.debug("Requisição para generate_roteiro recebida.", extra={"dados": {
+        "destino": contexto['destino'], "interesses": contexto['interesses'], "orcamento": contexto['orcamento'],
+        "tipo_viajante": contexto['tipo_viajante'], "max_price_level": contexto['max_price_level'],
+    }})
+
+    # O modo debug sempre executa o pipeline, sem passar pelo cache de roteiros
+    if request.args.get('debug'):
+        try:
+            resposta = build_roteiro(contexto)
+        except RoteiroError as e:
+            return jsonify({"mensagem": e.mensagem}), e.status
+        resposta["plano_consultas"] = contexto["plano"].to_dict()
+        return jsonify(resposta)
+
+    try:
+        resposta, etag = roteiro_with_cache(contexto)
+    except RoteiroError as e:
+        return jsonify({"mensagem": e.mensagem}), e.status
+    return etag_response(resposta, etag)
+
+def stream_events(produzir, sse=False):
+    """
+    Roda produzir(enviar) em outra thread e retorna um gerador que entrega cada evento
+    enviado assim que sai, como uma linha NDJSON ou, com sse=True, como Server-Sent Events.
+    """
+    eventos = queue.Queue()
+
+    def executar():
+        try:
+            produzir(eventos.put)
+        finally:
+            eventos.put(None)
+
+    # A thread herda o contexto, para que as etapas entrem no perfil da requisição
+    threading.Thread(target=contextvars.copy_context().run, args=(executar,), daemon=True).start()
+
+    def gerar():
+        while True:
+            evento = eventos.get()
+            if evento is None:
+                break
+            corpo = json.dumps(evento, ensure_ascii=False)
+            yield f"event: {evento['tipo']}\ndata: {corpo}\n\n" if sse else corpo + "\n"
+    return gerar()
+
+@app.route('/api/generate_roteiro/stream', methods=['POST'])
+def generate_roteiro_stream():
+    """
+    Variante em streaming de generate_roteiro.
+
+    Responde NDJSON (um evento JSON por linha) ou, com ?formato=sse ou Accept:
+    text/event-stream, Server-Sent Events. Os eventos são "progresso" (etapas e consultas
+    da coleta), "dia" (cada dia assim que é agendado), "resumo" (sugestão de orçamento e
+    ETag do roteiro) e "erro" (mensagem e status HTTP que a rota normal teria devolvido).
+    Se o roteiro já está no cache, a resposta traz o header ETag, e um If-None-Match com
+    ele recebe 304 Not Modified sem corpo.
+    """
+    if not GOOGLE_API_KEY:
+        return jsonify({"mensagem": "Erro: Chave de API do Google não configurada no backend."}), 500
+
+    contexto, erro = plan_for_request(request.json or {})
+    if erro:
+        return jsonify({"mensagem": erro[0]}), erro[1]
+
+    em_cache = cached_roteiro(contexto)
+    if em_cache is not None and request.if_none_match.contains(em_cache["etag"]):
+        response = app.response_class(status=304)
+        response.set_etag(em_cache["etag"])
+        return response
+
+    sse = request.args.get('formato') == 'sse' or request.accept_mimetypes.best == 'text/event-stream'
+
+    def produzir(enviar):
+        resumo = {}
+
+        def emitir(evento):
+            # O resumo sai por último, com o ETag, que só existe com o roteiro pronto
+            if evento["tipo"] == "resumo":
+                resumo.update(evento)
+            else:
+                enviar(evento)
+
+        try:
+            _, etag = roteiro_with_cache(contexto, on_event=emitir)
+            enviar({**resumo, "etag": etag})
+        except RoteiroError as e:
+            enviar({"tipo": "erro", "mensagem": e.mensagem, "status": e.status})
+        except Exception:
+            logger.exception("Erro inesperado no streaming do roteiro para '%s'", contexto['destino'])
+            enviar({"tipo": "erro", "mensagem": "Erro interno ao gerar o roteiro.", "status": 500})
+
+    response = Response(
+        stream_with_context(stream_events(produzir, sse=sse)),
+        mimetype='text/event-stream' if sse else 'application/x-ndjson',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    if em_cache is not None:
+        response.set_etag(em_cache["etag"])
+    return response
+
+def generate_result(contexto, on_event=None):
+    """Gera (ou busca no cache) o roteiro do contexto e retorna (status_http, corpo)."""
+    try:
+        resposta, _ = roteiro_with_cache(contexto, on_event=on_event)
+    except RoteiroError as e:
+        return e.status, {"mensagem": e.mensagem}
+    return 200, resposta
+
+def generate_for_batch(pedido, coleta):
+    """Gera um roteiro de um lote sobre a coleta compartilhada do destino; retorna (status, corpo)."""
+    contexto, erro = plan_for_request(pedido)
+    if erro:
+        return erro[1], {"mensagem": erro[0]}
+    contexto["coleta"] = coleta
+    return generate_result(contexto)
+
+def new_shared_collection():
+    return SharedCollection(get_coordinates, search_places)
+
+@app.route('/api/generate_roteiro/batch', methods=['POST'])
+def generate_roteiro_batch():
+    """
+    Gera roteiros em lote a partir de um array JSON ou de um corpo JSONL.
+
+    Os pedidos são agrupados por destino (geocodificação e buscas feitas uma vez por
+    destino) e os resultados saem em JSONL à medida que ficam prontos, cada um com o
+    "indice" do pedido no lote; a última linha é o resumo com a vazão.
+    """
+    if not GOOGLE_API_KEY:
+        return jsonify({"mensagem": "Erro: Chave de API do Google não configurada no backend."}), 500
+    try:
+        pedidos = parse_requests(request.get_data(as_text=True))
+    except ValueError as e:
+        return jsonify({"mensagem": f"Lote inválido: {e}"}), 400
+    if not isinstance(pedidos, list):
+        return jsonify({"mensagem": "Lote inválido: esperado um array JSON ou JSONL."}), 400
+
+    workers = max(1, min(request.args.get('workers', BATCH_WORKERS, type=int), BATCH_MAX_WORKERS))
+
+    def produzir(enviar):
+        resumo = run_batch(pedidos, generate_for_batch, new_shared_collection, workers=workers,
+                           on_result=lambda resultado: enviar({"tipo": "resultado", **resultado}))
+        enviar({"tipo": "resumo", **resumo})
+
+    return Response(stream_with_context(stream_events(produzir)), mimetype='application/x-ndjson')
+
+@app.route('/api/generate_roteiro/jobs', methods=['POST'])
+def create_roteiro_job():
+    """
+    Modo assíncrono de generate_roteiro: valida o pedido, agenda a geração num pool de
+    workers e responde 202 com o job_id. Pedidos reprodutíveis idênticos enquanto o job
+    ainda não terminou recebem o mesmo job.
+    """
+    if not GOOGLE_API_KEY:
+        return jsonify({"mensagem": "Erro: Chave de API do Google não configurada no backend."}), 500
+
+    contexto, erro = plan_for_request(request.json or {})
+    if erro:
+        return jsonify({"mensagem": erro[0]}), erro[1]
+
+    forcar_perfil = request.headers.get('X-Roteiro-Perfil') == '1'
+
+    def executar(job):
+        def acompanhar(evento):
+            if evento["tipo"] == "progresso":
+                job.progresso = {chave: valor for chave, valor in evento.items() if chave != "tipo"}
+
+        # O job roda fora da requisição: o perfil, se amostrado, é o da geração em si
+        perfil = profiler.start("/api/generate_roteiro/jobs/<job_id>", forcar=forcar_perfil)
+        status = 500
+        try:
+            status, corpo = generate_result(contexto, on_event=acompanhar)
+            return status, corpo
+        finally:
+            profiler.finish(perfil, status)
+
+    chave = None
+    if contexto["seed"] is not None:
+        chave = make_cache_key(ROTEIRO_CACHE_ENDPOINT, contexto["parametros_normalizados"])
+    try:
+        job, _ = roteiro_jobs.submit(executar, chave=chave)
+    except JobQueueFull as e:
+        logger.warning("Job de roteiro recusado: %s", e)
+        return jsonify({"mensagem": "Muitos roteiros na fila. Tente novamente em instantes."}), 503, {"Retry-After": "5"}
+
+    url = f"/api/generate_roteiro/jobs/{job.id}"
+    return jsonify({"job_id": job.id, "status": job.status, "url": url}), 202, {"Location": url}
+
+@app.route('/api/generate_roteiro/jobs/<job_id>', methods=['GET'])
+def get_roteiro_job(job_id):
+    """
+    Consulta um job. Com ?esperar=N (segundos, até ROTEIRO_JOB_MAX_WAIT), segura a resposta
+    até o job terminar ou o tempo acabar (long-poll). Responde 200 com o resultado ou o
+    erro quando o job terminou e 202 enquanto ele ainda está na fila ou em execução.
+    """
+    job = roteiro_jobs.get(job_id)
+    if job is None:
+        return jsonify({"mensagem": "Job não encontrado ou expirado."}), 404
+    esperar = request.args.get('esperar', 0, type=float)
+    if esperar > 0 and not job.finalizado:
+        job.wait(min(esperar, ROTEIRO_JOB_MAX_WAIT))
+    return jsonify(job.to_dict()), 200 if job.finalizado else 202
+
+@app.cli.command('gerar-lote')
+@click.argument('entrada', type=click.File('r', encoding='utf-8'))
+@click.option('-o', '--saida', type=click.File('w', encoding='utf-8'), default='-', help="Arquivo JSONL de saída (padrão: stdout).")
+@click.option('-w', '--workers', type=int, default=None, help="Destinos processados em paralelo.")
+def gerar_lote(entrada, saida, workers):
+    """Gera roteiros para os pedidos de ENTRADA (array JSON ou JSONL; '-' para stdin)."""
+    pedidos = parse_requests(entrada.read())
+    lock = threading.Lock()
+
+    def escrever(resultado):
+        with lock:
+            saida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            saida.flush()
+
+    resumo = run_batch(pedidos, generate_for_batch, new_shared_collection,
+                       workers=workers or BATCH_WORKERS, on_result=escrever)
+    click.echo(
+        f"{resumo['pedidos']} pedidos ({resumo['sucesso']} ok, {resumo['erros']} com erro) em "
+        f"{resumo['destinos']} destinos: {resumo['segundos']}s, {resumo['pedidos_por_segundo']} pedidos/s, "
+        f"{resumo['chamadas_google']} chamadas ao Google ({resumo['chamadas_reaproveitadas']} reaproveitadas).",
+        err=True,
+    )
+
+@app.cli.command('aquecer-indice')
+@click.argument('destinos', nargs=-1)
+@click.option('-a', '--arquivo', type=click.File('r', encoding='utf-8'), help="Arquivo com um destino por linha.")
+@click.option('-p', '--niveis-preco', default='1,2,3,4', help="Níveis de preço máximos a coletar (padrão: 1,2,3,4).")
+@click.option('-w', '--workers', type=int, default=None, help="Consultas simultâneas por destino.")
+@click.option('--forcar', is_flag=True, help="Refaz também as consultas ainda frescas no índice.")
+def aquecer_indice(destinos, arquivo, niveis_preco, workers, forcar):
+    """Coleta offline, para o índice local, as consultas que generate_roteiro faria para cada destino."""
+    if place_index is None:
+        raise click.ClickException("Índice de lugares desativado (PLACE_INDEX_PATH vazio).")
+    if not GOOGLE_API_KEY:
+        raise click.ClickException("GOOGLE_API_KEY não configurada.")
+    destinos = list(destinos)
+    if arquivo:
+        destinos.extend(linha.strip() for linha in arquivo if linha.strip() and not linha.startswith('#'))
+    if not destinos:
+        raise click.UsageError("Informe ao menos um destino (argumentos ou --arquivo).")
+    niveis = [int(nivel) for nivel in niveis_preco.split(',') if nivel.strip()]
 
+    removidos = place_index.purge_expired()
+    if removidos:
+        click.echo(f"{removidos} lugares vencidos removidos do índice.", err=True)
 
-    return jsonify({"roteiro": roteiro_gerado, "sugestao_orcamento": sugestao_orcamento})
+    for destino in dict.fromkeys(" ".join(d.lower().split()) for d in destinos):
+        inicio = time.perf_counter()
+        try:
+            resumo = crawl_destination(
+                place_index, destino, get_coordinates, search_places, crawl_queries(destino, niveis),
+                forcar=forcar, workers=workers or PLACES_MAX_CONCURRENCY, max_paginas=PLACES_MAX_PAGES,
+            )
+        except GoogleApiError as e:
+            click.echo(f"{destino}: erro ao consultar o Google ({e})", err=True)
+            continue
+        if "erro" in resumo:
+            click.echo(f"{destino}: {resumo['erro']}", err=True)
+            continue
+        click.echo(
+            f"{destino}: {resumo['consultas']} consultas, {resumo['paginas_executadas']} páginas buscadas, "
+            f"{resumo['paginas_frescas']} já frescas, {resumo['vazias']} consultas vazias; {resumo['lugares']} lugares no índice ({time.perf_counter() - inicio:.1f}s).",
+            err=True,
+        )
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    app.run(debug=True, port=5000)
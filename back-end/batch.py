@@ -0,0 +1,121 @@
+import contextvars
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def parse_requests(texto):
+    """Lê pedidos de roteiro de um array JSON ou de um texto JSONL (um pedido por linha)."""
+    texto = texto.strip()
+    if not texto:
+        return []
+    if texto.startswith('['):
+        return json.loads(texto)
+    pedidos = []
+    for numero, linha in enumerate(texto.splitlines(), start=1):
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            pedidos.append(json.loads(linha))
+        except ValueError as e:
+            raise ValueError(f"Linha {numero} não é um JSON válido: {e}")
+    return pedidos
+
+
+def destination_key(pedido):
+    """Destino normalizado usado para agrupar os pedidos de um lote."""
+    destino = pedido.get('destino') if isinstance(pedido, dict) else None
+    return " ".join(str(destino or '').lower().split())
+
+
+class SharedCollection:
+    """
+    Geocodificação e buscas na Places API compartilhadas pelos pedidos de um mesmo destino.
+
+    Cada chamada distinta (mesma query e mesmos parâmetros) é feita uma única vez no lote;
+    as repetições reaproveitam o resultado.
+    """
+
+    def __init__(self, get_coordinates, search_places):
+        self._get_coordinates = get_coordinates
+        self._search_places = search_places
+        self._chamadas = SingleFlight(manter_resultados=True)
+
+    def get_coordinates(self, destino):
+        return self._chamadas.do(("geocode", destino), self._get_coordinates, destino)
+
+    def search_places(self, query, location_bias=None, **kwargs):
+        chave = ("places", query, location_bias, tuple(sorted(kwargs.items())))
+        return self._chamadas.do(chave, self._search_places, query, location_bias=location_bias, **kwargs)
+
+    def stats(self):
+        return self._chamadas.stats()
+
+
+def run_batch(pedidos, gerar, nova_coleta, workers=4, on_result=None):
+    """
+    Gera os roteiros de um lote, agrupando os pedidos por destino.
+
+    Os destinos são processados em paralelo por até `workers` threads; dentro de um destino,
+    os pedidos rodam em sequência sobre a mesma coleta compartilhada (nova_coleta() cria
+    uma por destino). gerar(pedido, coleta) retorna (status_http, corpo). on_result recebe
+    cada resultado assim que fica pronto: {"indice", "request_id", "destino", "status", ...corpo}.
+    Retorna o resumo do lote com a vazão e as chamadas feitas e reaproveitadas.
+    """
+    inicio = time.perf_counter()
+    grupos = {}
+    for indice, pedido in enumerate(pedidos):
+        grupos.setdefault(destination_key(pedido), []).append((indice, pedido))
+
+    def processar_destino(destino, itens):
+        coleta = nova_coleta()
+        resultados = []
+        for indice, pedido in itens:
+            try:
+                status, corpo = gerar(pedido if isinstance(pedido, dict) else {}, coleta)
+            except Exception:
+                logger.exception("Erro inesperado no lote (pedido %d, destino '%s')", indice, destino)
+                status, corpo = 500, {"mensagem": "Erro interno ao gerar o roteiro."}
+            resultado = {
+                "indice": indice,
+                "request_id": pedido.get('request_id') if isinstance(pedido, dict) else None,
+                "destino": destino,
+                "status": status,
+                **corpo,
+            }
+            resultados.append(resultado)
+            if on_result:
+                on_result(resultado)
+        return resultados, coleta.stats()
+
+    sucesso = 0
+    chamadas = 0
+    reaproveitadas = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futuros = [
+            executor.submit(contextvars.copy_context().run, processar_destino, destino, itens)
+            for destino, itens in grupos.items()
+        ]
+        for futuro in as_completed(futuros):
+            resultados, stats = futuro.result()
+            sucesso += sum(1 for r in resultados if r["status"] == 200)
+            chamadas += stats["execucoes"]
+            reaproveitadas += stats["compartilhadas"]
+
+    duracao = time.perf_counter() - inicio
+    return {
+        "pedidos": len(pedidos),
+        "sucesso": sucesso,
+        "erros": len(pedidos) - sucesso,
+        "destinos": len(grupos),
+        "segundos": round(duracao, 3),
+        "pedidos_por_segundo": round(len(pedidos) / duracao, 2) if duracao > 0 else None,
+        "chamadas_google": chamadas,
+        "chamadas_reaproveitadas": reaproveitadas,
+    }
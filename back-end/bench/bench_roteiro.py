@@ -0,0 +1,264 @@
+"""
+Benchmark de carga de /api/generate_roteiro contra o servidor falso do Google.
+
+Uso (a partir de back-end/):
+    python bench/bench_roteiro.py [--dias 1 7 30 90] [--interesses 1 4 16] [--pool 50 300 1000]
+                                  [--requisicoes 16] [--concorrencia 8] [--latencia-ms 80]
+                                  [--taxa-erro 0.01] [--taxa-quota 0.0] [--comparar ARQUIVO.json]
+
+Cada cenário (dias x interesses x lugares por destino) sobe o app num servidor HTTP local,
+apontado para bench/fake_google.py (num subprocesso, para não disputar o GIL nem entrar
+na medição de memória), e dispara `requisicoes` pedidos, `concorrencia` por vez, cada um
+para um destino novo (sem acertos de cache). Reporta vazão, latência p50/p95/p99 e
+chamadas ao Google por pedido; o pico de memória alocada (tracemalloc, que deixa o app
+mais lento) é medido numa segunda passada do cenário, fora das medições de latência.
+Os resultados vão para bench/resultados/<data>_<commit>.json; --comparar mostra a
+variação em relação a uma execução anterior.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+ORCAMENTOS = [500, 1500, 3000, 10000]
+
+
+class FakeGoogleProcess:
+    """bench/fake_google.py rodando num subprocesso, controlado pelas rotas /__stats e /__config."""
+
+    def __init__(self, latencia_ms, taxa_erro, taxa_quota, gravacoes=None):
+        comando = [
+            sys.executable, os.path.join(BENCH_DIR, "fake_google.py"), "--porta", "0",
+            "--latencia-ms", str(latencia_ms), "--taxa-erro", str(taxa_erro), "--taxa-quota", str(taxa_quota),
+        ]
+        if gravacoes:
+            comando += ["--gravacoes", gravacoes]
+        self.processo = subprocess.Popen(comando, stdout=subprocess.PIPE, text=True)
+        linha = self.processo.stdout.readline()
+        encontrada = re.search(r"(http://\S+)", linha)
+        if not encontrada:
+            self.processo.kill()
+            raise RuntimeError(f"Servidor falso do Google não subiu: {linha!r}")
+        self.base_url = encontrada.group(1)
+        self._raiz = self.base_url.rsplit("/maps/api", 1)[0]
+        self._sessao = requests.Session()
+
+    def stats(self):
+        return self._sessao.get(f"{self._raiz}/__stats", timeout=10).json()
+
+    def configure(self, **config):
+        self._sessao.post(f"{self._raiz}/__config", json=config, timeout=10).raise_for_status()
+
+    def stop(self):
+        self.processo.terminate()
+        self.processo.wait(timeout=10)
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        sujo = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+    return f"{commit}-dirty" if sujo else commit
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por interpolação linear."""
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1]
+
+
+def make_request(cenario, indice, dias, interesses, tipos_viajante):
+    inicio = date(2024, 1, 1)
+    return {
+        "destino": f"bench {cenario} {indice}",
+        "interesses": interesses,
+        "tipoViajante": tipos_viajante[indice % len(tipos_viajante)],
+        "orcamento": ORCAMENTOS[indice % len(ORCAMENTOS)],
+        "dataInicio": inicio.isoformat(),
+        "dataFim": (inicio + timedelta(days=dias - 1)).isoformat(),
+    }
+
+
+def run_scenario(url, fake, cenario, pedidos, concorrencia):
+    """Dispara os pedidos com `concorrencia` clientes e retorna as métricas do cenário."""
+    sessoes = threading.local()
+
+    def enviar(pedido):
+        sessao = getattr(sessoes, "sessao", None)
+        if sessao is None:
+            sessao = sessoes.sessao = requests.Session()
+        inicio = time.perf_counter()
+        resposta = sessao.post(url, json=pedido, timeout=300)
+        return time.perf_counter() - inicio, resposta.status_code
+
+    antes = fake.stats()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(executor.map(enviar, pedidos))
+    duracao = time.perf_counter() - inicio
+    depois = fake.stats()
+
+    latencias = sorted(r[0] * 1000 for r in resultados)
+    chamadas = (depois["geocode"] - antes["geocode"]) + (depois["textsearch"] - antes["textsearch"])
+    return {
+        "cenario": cenario,
+        "requisicoes": len(pedidos),
+        "erros": sum(1 for r in resultados if r[1] != 200),
+        "segundos": round(duracao, 3),
+        "vazao_rps": round(len(pedidos) / duracao, 3),
+        "p50_ms": round(percentil(latencias, 50), 1),
+        "p95_ms": round(percentil(latencias, 95), 1),
+        "p99_ms": round(percentil(latencias, 99), 1),
+        "chamadas_por_pedido": round(chamadas / len(pedidos), 2),
+        "falhas_injetadas": (depois["erros_http"] - antes["erros_http"]) + (depois["erros_quota"] - antes["erros_quota"]),
+    }
+
+
+def measure_memory(url, pedidos, concorrencia):
+    """
+    Pico de memória alocada (MB) pelo processo ao atender os pedidos, com tracemalloc
+    ligado só durante esta passada. O Google falso roda em outro processo e fica de fora.
+    """
+    sessoes = threading.local()
+
+    def enviar(pedido):
+        sessao = getattr(sessoes, "sessao", None)
+        if sessao is None:
+            sessao = sessoes.sessao = requests.Session()
+        sessao.post(url, json=pedido, timeout=300)
+
+    tracemalloc.start()
+    try:
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            list(executor.map(enviar, pedidos))
+        return round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def _variacao(atual, base):
+    if not base:
+        return "    -"
+    return f"{(atual - base) / base * 100:+5.0f}%"
+
+
+def print_results(resultados, base=None):
+    base = {r["cenario"]: r for r in (base or {}).get("cenarios", [])}
+    print(f"{'cenario':<16} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6} {'chamadas':>9} {'pico MB':>8}")
+    for r in resultados:
+        pico = f"{r['pico_memoria_mb']:>8.1f}" if r["pico_memoria_mb"] is not None else f"{'-':>8}"
+        print(f"{r['cenario']:<16} {r['vazao_rps']:>7.2f} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} {r['p99_ms']:>8.0f} "
+              f"{r['erros']:>6} {r['chamadas_por_pedido']:>9.1f} {pico}")
+        anterior = base.get(r["cenario"])
+        if anterior:
+            print(f"{'  vs. base':<16} {_variacao(r['vazao_rps'], anterior['vazao_rps']):>7} "
+                  f"{_variacao(r['p50_ms'], anterior['p50_ms']):>8} {_variacao(r['p95_ms'], anterior['p95_ms']):>8} "
+                  f"{_variacao(r['p99_ms'], anterior['p99_ms']):>8} {'':>6} "
+                  f"{_variacao(r['chamadas_por_pedido'], anterior['chamadas_por_pedido']):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, nargs="+", default=[1, 7, 30, 90])
+    parser.add_argument("--interesses", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--pool", type=int, nargs="+", default=[50, 300, 1000], help="Lugares por destino no servidor falso.")
+    parser.add_argument("--requisicoes", type=int, default=16, help="Pedidos por cenário.")
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--latencia-ms", type=float, default=80)
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de chamadas com HTTP 500.")
+    parser.add_argument("--taxa-quota", type=float, default=0.0, help="Fração de chamadas com OVER_QUERY_LIMIT.")
+    parser.add_argument("--gravacoes", help="JSONL de respostas gravadas (ver bench/fake_google.py).")
+    parser.add_argument("--sem-memoria", action="store_true", help="Pula a passada de medição de memória (tracemalloc).")
+    parser.add_argument("--saida", default=os.path.join(BENCH_DIR, "resultados"))
+    parser.add_argument("--comparar", help="Arquivo de resultados anterior para comparação.")
+    args = parser.parse_args()
+
+    fake = FakeGoogleProcess(args.latencia_ms, args.taxa_erro, args.taxa_quota, gravacoes=args.gravacoes)
+
+    # Configuração do app antes de importá-lo: sem caches em disco nem limite de taxa
+    os.environ["GOOGLE_MAPS_API_BASE"] = fake.base_url
+    os.environ.setdefault("GOOGLE_API_KEY", "bench")
+    os.environ.setdefault("API_CACHE_PATH", "")
+    os.environ.setdefault("PLACE_INDEX_PATH", "")
+    os.environ.setdefault("GOOGLE_API_RATE", "0")
+    # Só avisos e erros do app, para não misturar o log com a saída do benchmark
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    import app as app_module
+    from constants import INTERESTS_TO_PLACE_TYPES, TIPO_VIAJANTE_PESOS
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    servidor_app = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=servidor_app.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor_app.server_port}/api/generate_roteiro"
+
+    todos_interesses = list(INTERESTS_TO_PLACE_TYPES)
+    tipos_viajante = list(TIPO_VIAJANTE_PESOS)
+    # Aquecimento (imports tardios, NumPy, conexões), fora das medições
+    run_scenario(url, fake, "aquecimento", [make_request("aquecimento", 0, 3, todos_interesses[:2], tipos_viajante)], 1)
+
+    resultados = []
+    for dias in args.dias:
+        for n_interesses in args.interesses:
+            for pool in args.pool:
+                cenario = f"d{dias}_i{n_interesses}_p{pool}"
+                fake.configure(pool=pool)
+                interesses = todos_interesses[:n_interesses]
+                pedidos = [make_request(cenario, i, dias, interesses, tipos_viajante) for i in range(args.requisicoes)]
+                resultado = run_scenario(url, fake, cenario, pedidos, args.concorrencia)
+                resultado["pico_memoria_mb"] = None
+                if not args.sem_memoria:
+                    # Destinos novos, para a passada de memória também não acertar o cache
+                    pedidos = [make_request(f"{cenario}_mem", i, dias, interesses, tipos_viajante) for i in range(args.requisicoes)]
+                    resultado["pico_memoria_mb"] = measure_memory(url, pedidos, args.concorrencia)
+                resultado.update({"dias": dias, "interesses": n_interesses, "pool": pool})
+                resultados.append(resultado)
+                print(f"{cenario}: {resultado['vazao_rps']} req/s, p95 {resultado['p95_ms']} ms", file=sys.stderr)
+
+    servidor_app.shutdown()
+    fake.stop()
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+    print_results(resultados, base)
+
+    commit = git_commit()
+    execucao = {
+        "commit": commit,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": app_module.spatial_available(),
+        "config": vars(args),
+        "cenarios": resultados,
+    }
+    os.makedirs(args.saida, exist_ok=True)
+    caminho = os.path.join(args.saida, f"{datetime.now():%Y%m%d-%H%M%S}_{commit}.json")
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(execucao, arquivo, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {caminho}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
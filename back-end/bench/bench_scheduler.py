@@ -0,0 +1,160 @@
+"""
+Micro-benchmark do agendamento de slots: laço original x SlotScheduler.
+
+Uso (a partir de back-end/):
+    python bench/bench_scheduler.py [--dias 90] [--candidatos 5000] [--repeticoes 3]
+
+Além de medir os tempos, confere se as duas implementações produzem as mesmas escolhas.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import schedule_days  # noqa: E402
+from scoring import Candidate  # noqa: E402
+
+PERIODOS_POSSIVEIS = [["manha", "tarde"], ["noite"], ["tarde", "noite"], ["manha", "tarde", "noite"], ["dia_inteiro"]]
+
+
+def legacy_schedule(pontos_para_roteiro, dias_viagem):
+    """Laço de geração do roteiro como era em app.py, reduzido à escolha dos slots."""
+    dias = []
+    atividades_usadas_geral = set()
+
+    for _ in range(1, dias_viagem + 1):
+        pontos_disponiveis_hoje = [item for item in pontos_para_roteiro if item['ponto']['place_id'] not in atividades_usadas_geral]
+        pontos_disponiveis_hoje.sort(key=lambda x: x['score'], reverse=True)
+
+        manha_slot = None
+        tarde_slot = None
+        noite_slot = None
+
+        for item in pontos_disponiveis_hoje:
+            ponto = item['ponto']
+            if "dia_inteiro" in ponto.get('melhor_periodo_dia', []) and not manha_slot and not tarde_slot and ponto['place_id'] not in atividades_usadas_geral:
+                manha_slot = ponto
+                tarde_slot = {"nome": "marcador_ocupado_dia_inteiro"}
+                atividades_usadas_geral.add(ponto['place_id'])
+                break
+
+        for item in pontos_disponiveis_hoje:
+            ponto = item['ponto']
+            if ponto['place_id'] not in atividades_usadas_geral and "noite" in ponto.get('melhor_periodo_dia', []) and not noite_slot:
+                noite_slot = ponto
+                atividades_usadas_geral.add(ponto['place_id'])
+                break
+
+        for item in pontos_disponiveis_hoje:
+            ponto = item['ponto']
+            if ponto['place_id'] not in atividades_usadas_geral and "manha" in ponto.get('melhor_periodo_dia', []) and not manha_slot:
+                manha_slot = ponto
+                atividades_usadas_geral.add(ponto['place_id'])
+                break
+
+        for item in pontos_disponiveis_hoje:
+            ponto = item['ponto']
+            if ponto['place_id'] not in atividades_usadas_geral and "tarde" in ponto.get('melhor_periodo_dia', []) and not tarde_slot:
+                tarde_slot = ponto
+                atividades_usadas_geral.add(ponto['place_id'])
+                break
+
+        pontos_restantes_para_dia = [item for item in pontos_disponiveis_hoje if item['ponto']['place_id'] not in atividades_usadas_geral]
+        pontos_restantes_para_dia.sort(key=lambda x: x['score'], reverse=True)
+
+        for item in pontos_restantes_para_dia:
+            ponto = item['ponto']
+            if not manha_slot and ponto['duracao_horas'] <= 3:
+                manha_slot = ponto
+                atividades_usadas_geral.add(ponto['place_id'])
+            elif not tarde_slot and ponto['duracao_horas'] <= 4:
+                tarde_slot = ponto
+                atividades_usadas_geral.add(ponto['place_id'])
+            elif not noite_slot and ponto['duracao_horas'] <= 3:
+                noite_slot = ponto
+                atividades_usadas_geral.add(ponto['place_id'])
+
+        dia_inteiro = tarde_slot is not None and tarde_slot.get("nome") == "marcador_ocupado_dia_inteiro"
+        dias.append({
+            "manha": manha_slot,
+            "tarde": None if dia_inteiro else tarde_slot,
+            "noite": noite_slot,
+            "dia_inteiro": dia_inteiro,
+        })
+    return dias
+
+
+def synthetic_candidates(n, seed):
+    """Gera candidatos já pontuados e ordenados por score, como em generate_roteiro."""
+    rnd = random.Random(seed)
+    candidatos = []
+    for i in range(n):
+        candidato = Candidate(f"place_{i}", f"Lugar {i}", 0)
+        candidato.duracao_horas = rnd.choice([1, 2, 2, 3, 3, 4, 5])
+        candidato.melhor_periodo_dia = list(rnd.choice(PERIODOS_POSSIVEIS))
+        # Poucos valores distintos para exercitar empates
+        candidato.score = rnd.choice([30, 200, 203, 205, 400, 404])
+        candidatos.append(candidato)
+    candidatos.sort(key=lambda x: x.score, reverse=True)
+    return candidatos
+
+
+def legacy_items(candidatos):
+    """Converte os candidatos para os dicts {"ponto", "score"} usados pelo laço original."""
+    return [
+        {
+            "ponto": {
+                "nome": c.nome,
+                "place_id": c.place_id,
+                "duracao_horas": c.duracao_horas,
+                "melhor_periodo_dia": c.melhor_periodo_dia,
+            },
+            "score": c.score,
+        }
+        for c in candidatos
+    ]
+
+
+def _ids(dias):
+    def place_id(ponto):
+        if ponto is None:
+            return None
+        return ponto['place_id'] if isinstance(ponto, dict) else ponto.place_id
+    return [tuple(place_id(dia[slot]) for slot in ("manha", "tarde", "noite")) + (dia["dia_inteiro"],) for dia in dias]
+
+
+def _medir(funcao, itens, dias, repeticoes):
+    melhor = float("inf")
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(itens, dias)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, nargs="+", default=[7, 30, 90])
+    parser.add_argument("--candidatos", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'dias':>5} {'candidatos':>10} {'original (ms)':>14} {'indexado (ms)':>14} {'ganho':>8}  iguais")
+    for dias in args.dias:
+        for n in args.candidatos:
+            itens = synthetic_candidates(n, args.seed)
+            t_original, r_original = _medir(legacy_schedule, legacy_items(itens), dias, args.repeticoes)
+            t_indexado, r_indexado = _medir(schedule_days, itens, dias, args.repeticoes)
+            iguais = _ids(r_original) == _ids(r_indexado)
+            print(f"{dias:>5} {n:>10} {t_original * 1000:>14.2f} {t_indexado * 1000:>14.2f} {t_original / t_indexado:>7.1f}x  {'sim' if iguais else 'NAO'}")
+            if not iguais:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Servidor local que imita as APIs Geocoding e Places Text Search do Google.
+
+Uso (a partir de back-end/):
+    python bench/fake_google.py [--porta 8765] [--latencia-ms 80] [--taxa-erro 0.01]
+                                [--taxa-quota 0.01] [--pool 300] [--gravacoes respostas.jsonl]
+
+e, no backend, GOOGLE_MAPS_API_BASE=http://127.0.0.1:8765/maps/api.
+
+As respostas são sintéticas e determinísticas: cada destino tem um conjunto fixo de
+`pool` lugares (com tipos, price_level e coordenadas em volta do centro do destino), e
+cada consulta devolve páginas de 20 desses lugares, com next_page_token até a 3ª página.
+Com --gravacoes, respostas gravadas (JSONL com {"endpoint": "geocode" | "textsearch",
+"params": {...}, "resposta": {...}}) têm prioridade sobre as sintéticas. Latência e
+falhas (HTTP 500 e OVER_QUERY_LIMIT) são sorteadas por chamada. GET /__stats retorna os
+contadores de chamadas, POST /__reset os zera e POST /__config (JSON com "pool",
+"latencia_ms", "taxa_erro" ou "taxa_quota") muda a configuração. Com --porta 0, uma
+porta livre é escolhida; a URL base aparece na primeira linha da saída.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+TIPOS = [
+    "museum", "art_gallery", "park", "restaurant", "food", "cafe", "bar", "night_club", "beach",
+    "natural_feature", "amusement_park", "zoo", "historic_site", "church", "point_of_interest",
+    "tourist_attraction", "shopping_mall", "spa", "store", "bakery", "aquarium", "movie_theater",
+]
+RESULTADOS_POR_PAGINA = 20
+MAX_PAGINAS = 3
+
+
+def _semente(*partes):
+    return hashlib.sha256("|".join(str(p) for p in partes).encode('utf-8')).hexdigest()
+
+
+def _chave_gravacao(endpoint, params):
+    return json.dumps([endpoint, sorted((k, v) for k, v in params.items() if k != "key")], ensure_ascii=False)
+
+
+class FakeGoogle:
+    """Gera as respostas e guarda os contadores; independente do servidor HTTP."""
+
+    def __init__(self, latencia_ms=0, taxa_erro=0.0, taxa_quota=0.0, pool=300, gravacoes=None, seed=0):
+        self.latencia_ms = latencia_ms
+        self.taxa_erro = taxa_erro
+        self.taxa_quota = taxa_quota
+        self.pool = pool
+        self.gravacoes = {}
+        self._random = random.Random(seed)
+        self._pools = {}
+        self._lock = threading.Lock()
+        self.reset()
+        if gravacoes:
+            self.load_recordings(gravacoes)
+
+    def load_recordings(self, caminho):
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                if linha.strip():
+                    gravacao = json.loads(linha)
+                    self.gravacoes[_chave_gravacao(gravacao["endpoint"], gravacao["params"])] = gravacao["resposta"]
+
+    def reset(self):
+        with self._lock:
+            self.contadores = {"geocode": 0, "textsearch": 0, "erros_http": 0, "erros_quota": 0, "gravadas": 0}
+
+    def stats(self):
+        with self._lock:
+            return dict(self.contadores)
+
+    def configure(self, **config):
+        for nome in ("pool", "latencia_ms", "taxa_erro", "taxa_quota"):
+            if nome in config:
+                setattr(self, nome, config[nome])
+
+    def _contar(self, evento):
+        with self._lock:
+            self.contadores[evento] += 1
+
+    def _sortear(self):
+        with self._lock:
+            return self._random.random(), self._random.uniform(0.5, 1.5)
+
+    def handle(self, endpoint, params):
+        """Retorna (status_http, corpo) para uma chamada a endpoint ("geocode" ou "textsearch")."""
+        self._contar(endpoint)
+        sorteio, fator_latencia = self._sortear()
+        if self.latencia_ms:
+            time.sleep(self.latencia_ms * fator_latencia / 1000)
+        if sorteio < self.taxa_erro:
+            self._contar("erros_http")
+            return 500, {"status": "UNKNOWN_ERROR"}
+        if sorteio < self.taxa_erro + self.taxa_quota:
+            self._contar("erros_quota")
+            return 200, {"status": "OVER_QUERY_LIMIT", "error_message": "Quota simulada excedida."}
+
+        gravada = self.gravacoes.get(_chave_gravacao(endpoint, params))
+        if gravada is not None:
+            self._contar("gravadas")
+            return 200, gravada
+        if endpoint == "geocode":
+            return 200, self._geocode(params.get("address", ""))
+        return 200, self._textsearch(params)
+
+    def _geocode(self, endereco):
+        rnd = random.Random(_semente("geocode", endereco))
+        lat, lng = rnd.uniform(-35, 5), rnd.uniform(-75, -35)
+        return {"status": "OK", "results": [{"geometry": {"location": {"lat": round(lat, 6), "lng": round(lng, 6)}}}]}
+
+    def _lugares(self, location_bias):
+        # Um conjunto fixo de lugares por destino (identificado pelo locationbias)
+        with self._lock:
+            lugares = self._pools.get(location_bias)
+        if lugares is not None:
+            return lugares
+        try:
+            lat, lng = (float(v) for v in location_bias.split(":", 1)[1].split(","))
+        except (IndexError, ValueError):
+            lat, lng = 0.0, 0.0
+        prefixo = _semente("pool", location_bias)[:8]
+        lugares = []
+        for indice in range(self.pool):
+            rnd = random.Random(_semente(prefixo, indice))
+            lugar = {
+                "place_id": f"{prefixo}_{indice}",
+                "name": f"Lugar {indice}",
+                "types": rnd.sample(TIPOS, rnd.randint(1, 4)),
+                "geometry": {"location": {"lat": lat + rnd.uniform(-0.1, 0.1), "lng": lng + rnd.uniform(-0.1, 0.1)}},
+            }
+            if rnd.random() < 0.7:
+                lugar["price_level"] = rnd.randint(0, 4)
+            lugares.append(lugar)
+        with self._lock:
+            self._pools.setdefault(location_bias, lugares)
+        return lugares
+
+    def _textsearch(self, params):
+        if params.get("pagetoken"):
+            try:
+                consulta = json.loads(bytes.fromhex(params["pagetoken"]).decode('utf-8'))
+            except ValueError:
+                return {"status": "INVALID_REQUEST", "error_message": "pagetoken inválido."}
+        else:
+            consulta = {
+                "query": params.get("query", ""),
+                "locationbias": params.get("locationbias", ""),
+                "maxprice": params.get("maxprice"),
+                "pagina": 1,
+            }
+        lugares = self._lugares(consulta["locationbias"])
+        rnd = random.Random(_semente(consulta["query"], consulta["locationbias"], consulta["maxprice"], consulta["pagina"]))
+        resultados = rnd.sample(lugares, min(RESULTADOS_POR_PAGINA, len(lugares)))
+        if consulta["maxprice"] is not None:
+            maximo = int(consulta["maxprice"])
+            resultados = [lugar for lugar in resultados if lugar.get("price_level", 0) <= maximo]
+
+        corpo = {"status": "OK" if resultados else "ZERO_RESULTS", "results": resultados}
+        if consulta["pagina"] < MAX_PAGINAS and len(lugares) > RESULTADOS_POR_PAGINA * consulta["pagina"]:
+            proxima = dict(consulta, pagina=consulta["pagina"] + 1)
+            corpo["next_page_token"] = json.dumps(proxima, ensure_ascii=False).encode('utf-8').hex()
+        return corpo
+
+
+def _handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _responder(self, status, corpo):
+            dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            partes = urlsplit(self.path)
+            params = dict(parse_qsl(partes.query))
+            if partes.path == "/__stats":
+                self._responder(200, fake.stats())
+            elif partes.path.endswith("/geocode/json"):
+                self._responder(*fake.handle("geocode", params))
+            elif partes.path.endswith("/place/textsearch/json"):
+                self._responder(*fake.handle("textsearch", params))
+            else:
+                self._responder(404, {"status": "NOT_FOUND"})
+
+        def do_POST(self):
+            caminho = urlsplit(self.path).path
+            if caminho == "/__reset":
+                fake.reset()
+                self._responder(200, {"ok": True})
+            elif caminho == "/__config":
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                fake.configure(**json.loads(self.rfile.read(tamanho) or b"{}"))
+                self._responder(200, {"ok": True})
+            else:
+                self._responder(404, {"status": "NOT_FOUND"})
+
+        def log_message(self, formato, *args):
+            pass
+
+    return Handler
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+    # A fila padrão de conexões (5) transborda com dezenas de buscas simultâneas, e cada
+    # conexão recusada só é refeita pelo cliente depois de ~1 s
+    request_queue_size = 128
+
+
+def start_server(fake, host="127.0.0.1", porta=0):
+    """Sobe o servidor numa thread e retorna (servidor, base_url para GOOGLE_MAPS_API_BASE)."""
+    servidor = _Servidor((host, porta), _handler(fake))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}/maps/api"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia-ms", type=float, default=80)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--taxa-quota", type=float, default=0.0)
+    parser.add_argument("--pool", type=int, default=300)
+    parser.add_argument("--gravacoes")
+    args = parser.parse_args()
+
+    fake = FakeGoogle(args.latencia_ms, args.taxa_erro, args.taxa_quota, args.pool, args.gravacoes)
+    servidor, base = start_server(fake, args.host, args.porta)
+    print(f"Servidor falso do Google em {base} (Ctrl+C para parar)", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
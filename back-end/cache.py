@@ -0,0 +1,180 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_params(params):
+    """Normaliza os parâmetros de uma chamada, removendo a chave de API."""
+    normalizados = {}
+    for nome, valor in (params or {}).items():
+        if nome == "key" or valor is None:
+            continue
+        normalizados[nome] = " ".join(str(valor).split()).lower()
+    return normalizados
+
+
+def make_cache_key(endpoint, params):
+    """Gera a chave de cache a partir do endpoint normalizado e dos parâmetros (sem a chave de API)."""
+    bruto = json.dumps([endpoint.strip().rstrip('/').lower(), sorted(normalize_params(params).items())], ensure_ascii=False)
+    return hashlib.sha256(bruto.encode('utf-8')).hexdigest()
+
+
+class ResponseCache(SQLiteStore):
+    """
+    Cache de respostas (das APIs do Google e de roteiros prontos) em dois níveis.
+
+    O primeiro nível é um LRU em memória limitado por número de entradas; o segundo é um
+    arquivo SQLite que sobrevive a reinícios e é compartilhado entre os processos workers.
+    Cada endpoint tem seu próprio TTL (em segundos); endpoints sem TTL não são cacheados.
+    A cada `purge_every` gravações, o nível em disco perde as entradas expiradas e, acima
+    de `max_disk_entries`, as que expiram primeiro.
+    """
+
+    def __init__(self, db_path=None, max_entries=1024, ttls=None, max_disk_entries=100000, purge_every=500):
+        super().__init__(db_path, purge_every)
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttls = dict(ttls or {})
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self._contadores = {}
+        if self.db_path:
+            self._init_db()
+            self.purge_expired()
+
+    def _init_db(self):
+        conn = self._conexao()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS respostas ("
+            " chave TEXT PRIMARY KEY,"
+            " endpoint TEXT NOT NULL,"
+            " valor TEXT NOT NULL,"
+            " expira_em REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_expira_em ON respostas (expira_em)")
+        conn.commit()
+
+    def _contar(self, endpoint, evento):
+        with self._lock:
+            contadores = self._contadores.setdefault(endpoint, {"hits_memoria": 0, "hits_disco": 0, "misses": 0})
+            contadores[evento] += 1
+
+    def get(self, endpoint, params):
+        """Retorna a resposta cacheada para (endpoint, params) ou None se ausente ou expirada."""
+        if not self.ttls.get(endpoint):
+            return None
+        chave = make_cache_key(endpoint, params)
+        agora = time.time()
+
+        with self._lock:
+            entrada = self._memoria.get(chave)
+            if entrada is not None:
+                expira_em, valor = entrada
+                if expira_em > agora:
+                    self._memoria.move_to_end(chave)
+                else:
+                    del self._memoria[chave]
+                    entrada = None
+        if entrada is not None:
+            self._contar(endpoint, "hits_memoria")
+            return valor
+
+        if self.db_path:
+            try:
+                linha = self._conexao().execute(
+                    "SELECT valor, expira_em FROM respostas WHERE chave = ? AND expira_em > ?",
+                    (chave, agora)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.error("Erro ao ler o cache em disco: %s", e)
+                linha = None
+            if linha:
+                valor = json.loads(linha[0])
+                self._guardar_memoria(chave, linha[1], valor)
+                self._contar(endpoint, "hits_disco")
+                return valor
+
+        self._contar(endpoint, "misses")
+        return None
+
+    def set(self, endpoint, params, valor):
+        """Armazena a resposta nos dois níveis com o TTL do endpoint."""
+        ttl = self.ttls.get(endpoint)
+        if not ttl:
+            return
+        chave = make_cache_key(endpoint, params)
+        expira_em = time.time() + ttl
+        self._guardar_memoria(chave, expira_em, valor)
+
+        if self.db_path:
+            try:
+                conn = self._conexao()
+                conn.execute(
+                    "INSERT OR REPLACE INTO respostas (chave, endpoint, valor, expira_em) VALUES (?, ?, ?, ?)",
+                    (chave, endpoint, json.dumps(valor, ensure_ascii=False), expira_em)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error("Erro ao gravar no cache em disco: %s", e)
+            self._registrar_gravacao()
+
+    def _guardar_memoria(self, chave, expira_em, valor):
+        with self._lock:
+            self._memoria[chave] = (expira_em, valor)
+            self._memoria.move_to_end(chave)
+            while len(self._memoria) > self.max_entries:
+                self._memoria.popitem(last=False)
+
+    def purge_expired(self):
+        """
+        Remove do cache em disco as entradas expiradas e, acima de max_disk_entries, as que
+        expiram primeiro. Retorna o número de entradas removidas.
+        """
+        if not self.db_path:
+            return 0
+        try:
+            conn = self._conexao()
+            with conn:
+                removidas = conn.execute("DELETE FROM respostas WHERE expira_em <= ?", (time.time(),)).rowcount
+                if self.max_disk_entries:
+                    removidas += conn.execute(
+                        "DELETE FROM respostas WHERE chave IN ("
+                        " SELECT chave FROM respostas ORDER BY expira_em DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,)
+                    ).rowcount
+        except sqlite3.Error as e:
+            logger.error("Erro ao limpar o cache em disco: %s", e)
+            return 0
+        if removidas:
+            logger.info("Cache em disco: %d entradas removidas.", removidas)
+        return removidas
+
+    def stats(self):
+        """Retorna os contadores de hits/misses por endpoint e o tamanho do nível em memória."""
+        with self._lock:
+            return {
+                "entradas_memoria": len(self._memoria),
+                "max_entradas_memoria": self.max_entries,
+                "endpoints": {endpoint: dict(c) for endpoint, c in self._contadores.items()},
+            }
+
+
+def cache_from_env(ttls, max_entries=None):
+    """Cria o cache de respostas a partir das variáveis de ambiente."""
+    db_path = os.getenv('API_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api_cache.sqlite3'))
+    if max_entries is None:
+        max_entries = int(os.getenv('API_CACHE_MAX_ENTRIES', '2048'))
+    return ResponseCache(
+        db_path=db_path or None, max_entries=max_entries, ttls=ttls,
+        max_disk_entries=int(os.getenv('API_CACHE_MAX_DISK_ENTRIES', '100000')),
+        purge_every=int(os.getenv('API_CACHE_PURGE_EVERY', '500')),
+    )
@@ -0,0 +1,35 @@
+INTERESTS_TO_PLACE_TYPES = {
+    "praias": ["beach", "natural_feature"],
+    "museus": ["museum", "art_gallery"],
+    "trilhas": ["park", "natural_feature", "point_of_interest"],
+    "vida-noturna": ["night_club", "bar"],
+    "compras": ["shopping_mall", "store", "department_store"],
+    "gastronomia": ["restaurant", "food", "cafe", "bakery"],
+    "monumentos": ["point_of_interest", "tourist_attraction", "historic_site"],
+    "historia": ["historic_site", "museum", "church", "synagogue", "hindu_temple", "mosque"],
+    "fotografia": ["tourist_attraction", "point_of_interest", "park", "natural_feature"],
+    "relax": ["spa", "park", "beach", "beauty_salon"],
+    "romance": ["restaurant", "point_of_interest", "park", "bar"],
+    "arte": ["art_gallery", "museum"],
+    "parques": ["amusement_park", "park", "zoo"],
+    "diversao": ["amusement_park", "park", "aquarium", "bowling_alley", "movie_theater"],
+    "natureza": ["natural_feature", "park"],
+    "aventura": ["park", "natural_feature", "amusement_park"]
+}
+
+TIPO_VIAJANTE_PESOS = {
+    "familia": {"park": 4, "amusement_park": 5, "zoo": 4, "aquarium": 4, "museum": 3, "beach": 3},
+    "aventureiro": {"natural_feature": 5, "park": 4, "beach": 4, "night_club": 3, "bar": 3},
+    "cultural": {"museum": 5, "art_gallery": 4, "historic_site": 4, "point_of_interest": 3},
+    "gastronomico": {"restaurant": 6, "food": 5, "cafe": 4, "bakery": 3},
+    "casais": {"restaurant": 4, "point_of_interest": 4, "park": 3, "bar": 3, "spa": 3},
+    "relax": {"spa": 5, "park": 4, "beach": 4, "beauty_salon": 3}
+}
+
+PRICE_LEVEL_MAP = {
+    0: "Grátis",
+    1: "Barato",
+    2: "Moderado",
+    3: "Caro",
+    4: "Muito Caro"
+}
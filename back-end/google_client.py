@@ -0,0 +1,154 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Status HTTP e status da API do Google que valem uma nova tentativa
+RETRYABLE_HTTP_STATUSES = (429, 500, 502, 503, 504)
+RETRYABLE_API_STATUSES = ("OVER_QUERY_LIMIT", "UNKNOWN_ERROR")
+
+CHAMADAS = registry.counter(
+    "google_chamadas_total", "Chamadas HTTP às APIs do Google (inclusive novas tentativas) por API e resultado.",
+    ("api", "resultado"),
+)
+DURACAO = registry.histogram("google_chamada_segundos", "Duração de cada chamada HTTP às APIs do Google.", ("api",))
+
+
+class GoogleApiError(Exception):
+    """Falha ao consultar uma API do Google depois de esgotadas as tentativas."""
+
+
+class GoogleQuotaError(GoogleApiError):
+    """A API do Google continuou respondendo OVER_QUERY_LIMIT depois das tentativas."""
+
+
+class TokenBucket:
+    """Limitador de taxa por token bucket, compartilhado por todas as threads do processo."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloqueia até haver um token disponível e o consome."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (agora - self._ultimo) * self.rate)
+                self._ultimo = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.rate
+            time.sleep(espera)
+
+
+class GoogleClient:
+    """
+    Cliente HTTP compartilhado para as APIs Places e Geocoding.
+
+    Mantém um pool de conexões keep-alive, aplica timeouts de conexão/leitura, limita a
+    taxa de chamadas do processo e repete falhas transitórias com backoff exponencial
+    com jitter.
+    """
+
+    def __init__(self, pool_size=16, connect_timeout=3.05, read_timeout=10,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0, rate_limiter=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        # Gerador próprio para o jitter, sem interferir no estado global de random
+        self._random = random.Random()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @staticmethod
+    def _api(url):
+        # ".../geocode/json" -> "geocode"; ".../place/textsearch/json" -> "textsearch"
+        return url.rstrip('/').split('/')[-2]
+
+    def _backoff(self, tentativa):
+        time.sleep(self._random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** tentativa))))
+
+    def get_json(self, url, params):
+        """
+        Faz um GET e retorna o JSON da resposta.
+
+        Lança GoogleQuotaError se a quota continuar estourada após as tentativas e
+        GoogleApiError para as demais falhas persistentes.
+        """
+        api = self._api(url)
+        ultimo_erro = None
+        for tentativa in range(self.max_retries + 1):
+            if tentativa:
+                logger.warning("Nova tentativa %d/%d para a API %s: %s", tentativa, self.max_retries, api, ultimo_erro)
+                self._backoff(tentativa - 1)
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            inicio = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                DURACAO.observe(time.perf_counter() - inicio, api=api)
+                CHAMADAS.inc(api=api, resultado="erro_conexao")
+                # O texto da exceção do requests traz a URL completa, com key=: só o tipo entra na mensagem
+                ultimo_erro = GoogleApiError(f"Falha de conexão com {url}: {type(e).__name__}")
+                continue
+            DURACAO.observe(time.perf_counter() - inicio, api=api)
+
+            if response.status_code in RETRYABLE_HTTP_STATUSES:
+                CHAMADAS.inc(api=api, resultado=f"http_{response.status_code}")
+                ultimo_erro = GoogleApiError(f"HTTP {response.status_code} em {url}")
+                continue
+
+            try:
+                data = response.json()
+            except ValueError:
+                CHAMADAS.inc(api=api, resultado=f"http_{response.status_code}")
+                raise GoogleApiError(f"Resposta inválida de {url} (HTTP {response.status_code})")
+
+            status = data.get('status')
+            CHAMADAS.inc(api=api, resultado=status or "sem_status")
+            if status in RETRYABLE_API_STATUSES:
+                mensagem = data.get('error_message', status)
+                if status == "OVER_QUERY_LIMIT":
+                    ultimo_erro = GoogleQuotaError(f"Quota da API do Google excedida: {mensagem}")
+                else:
+                    ultimo_erro = GoogleApiError(f"Erro transitório da API do Google: {mensagem}")
+                continue
+
+            return data
+
+        raise ultimo_erro
+
+
+def client_from_env():
+    """Cria o cliente compartilhado a partir das variáveis de ambiente."""
+    rate = float(os.getenv('GOOGLE_API_RATE', '10'))
+    burst = float(os.getenv('GOOGLE_API_BURST', '20'))
+    return GoogleClient(
+        pool_size=int(os.getenv('GOOGLE_HTTP_POOL_SIZE', '16')),
+        connect_timeout=float(os.getenv('GOOGLE_HTTP_CONNECT_TIMEOUT', '3.05')),
+        read_timeout=float(os.getenv('GOOGLE_HTTP_READ_TIMEOUT', '10')),
+        max_retries=int(os.getenv('GOOGLE_API_MAX_RETRIES', '3')),
+        rate_limiter=TokenBucket(rate, burst),
+    )
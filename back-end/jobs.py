@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+
+class JobQueueFull(Exception):
+    """A fila de jobs atingiu o limite de jobs pendentes."""
+
+
+class Job:
+    """Um pedido de roteiro executado em segundo plano."""
+
+    def __init__(self, chave=None):
+        self.id = uuid.uuid4().hex
+        self.chave = chave
+        self.status = PENDENTE
+        self.criado_em = time.time()
+        self.concluido_em = None
+        self.progresso = None
+        self.resultado = None
+        self.erro = None
+        self._pronto = threading.Event()
+
+    @property
+    def finalizado(self):
+        return self._pronto.is_set()
+
+    def wait(self, timeout):
+        return self._pronto.wait(timeout)
+
+    def to_dict(self):
+        corpo = {"job_id": self.id, "status": self.status, "criado_em": self.criado_em}
+        if self.progresso is not None:
+            corpo["progresso"] = self.progresso
+        if self.status == CONCLUIDO:
+            corpo["resultado"] = self.resultado
+        elif self.status == ERRO:
+            corpo["erro"] = self.erro
+        return corpo
+
+
+class JobManager:
+    """
+    Executa jobs num pool limitado de threads e guarda os resultados por algum tempo.
+
+    Jobs com a mesma chave enquanto um deles ainda não terminou são o mesmo job. Com
+    max_pendentes jobs esperando na fila, novos envios são recusados (JobQueueFull).
+    Jobs finalizados ficam disponíveis por `retencao` segundos.
+    """
+
+    def __init__(self, workers=4, max_pendentes=64, retencao=600):
+        self.workers = workers
+        self.max_pendentes = max_pendentes
+        self.retencao = retencao
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="roteiro-job")
+        self._jobs = {}
+        self._por_chave = {}
+        self._lock = threading.Lock()
+
+    def submit(self, funcao, chave=None):
+        """
+        Agenda funcao(job) e retorna (job, novo). funcao retorna (status_http, corpo), como
+        em generate_for_batch: status 200 conclui o job com o corpo; os demais viram o erro.
+        """
+        with self._lock:
+            self._purge()
+            if chave is not None:
+                existente = self._por_chave.get(chave)
+                if existente is not None and not existente.finalizado:
+                    return existente, False
+            pendentes = sum(1 for job in self._jobs.values() if job.status == PENDENTE)
+            if pendentes >= self.max_pendentes:
+                raise JobQueueFull(f"{pendentes} jobs aguardando execução")
+            job = Job(chave)
+            self._jobs[job.id] = job
+            if chave is not None:
+                self._por_chave[chave] = job
+        self._executor.submit(self._run, job, funcao)
+        return job, True
+
+    def _run(self, job, funcao):
+        job.status = EXECUTANDO
+        try:
+            status, corpo = funcao(job)
+        except Exception:
+            logger.exception("Erro inesperado no job %s", job.id)
+            status, corpo = 500, {"mensagem": "Erro interno ao gerar o roteiro."}
+        if status == 200:
+            job.resultado = corpo
+            job.status = CONCLUIDO
+        else:
+            job.erro = {"status": status, **corpo}
+            job.status = ERRO
+        job.concluido_em = time.time()
+        job._pronto.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _purge(self):
+        limite = time.time() - self.retencao
+        expirados = [job_id for job_id, job in self._jobs.items() if job.concluido_em is not None and job.concluido_em < limite]
+        for job_id in expirados:
+            job = self._jobs.pop(job_id)
+            if self._por_chave.get(job.chave) is job:
+                del self._por_chave[job.chave]
+
+    def stats(self):
+        with self._lock:
+            contagem = {PENDENTE: 0, EXECUTANDO: 0, CONCLUIDO: 0, ERRO: 0}
+            for job in self._jobs.values():
+                contagem[job.status] += 1
+            return {"workers": self.workers, "max_pendentes": self.max_pendentes, "jobs": contagem}
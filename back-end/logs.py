@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+
+# Parâmetro key=... em URLs logadas (inclusive pelo urllib3 em nível DEBUG)
+_CHAVE_NA_URL = re.compile(r"(key=)[^&\s'\"]+")
+_FORMATADOR = logging.Formatter()
+
+
+class RedactSecretsFilter(logging.Filter):
+    """
+    Troca a chave da API (e qualquer key=... de URL) por *** nas mensagens, nos campos de
+    extra={"dados": {...}} e no texto das exceções e da pilha.
+    """
+
+    def __init__(self, segredos=()):
+        super().__init__()
+        # Valores curtos (como chaves de teste) trocariam pedaços de palavras comuns
+        self.segredos = [segredo for segredo in segredos if segredo and len(segredo) >= 8]
+
+    def _limpar(self, valor):
+        if isinstance(valor, str):
+            valor = _CHAVE_NA_URL.sub(r"\1***", valor)
+            for segredo in self.segredos:
+                valor = valor.replace(segredo, "***")
+            return valor
+        if isinstance(valor, dict):
+            return {chave: self._limpar(item) for chave, item in valor.items()}
+        if isinstance(valor, (list, tuple)):
+            return [self._limpar(item) for item in valor]
+        return valor
+
+    def filter(self, record):
+        mensagem = record.getMessage()
+        limpa = self._limpar(mensagem)
+        if limpa != mensagem:
+            record.msg = limpa
+            record.args = None
+        if isinstance(getattr(record, "dados", None), dict):
+            record.dados = self._limpar(record.dados)
+        # O texto da exceção é gerado aqui, já limpo; os formatadores usam exc_text se presente
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _FORMATADOR.formatException(record.exc_info)
+        if record.exc_text:
+            record.exc_text = self._limpar(record.exc_text)
+        if record.stack_info:
+            record.stack_info = self._limpar(record.stack_info)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com os campos de extra={"dados": {...}} no nível de cima."""
+
+    def format(self, record):
+        corpo = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            **getattr(record, "dados", {}),
+        }
+        if record.exc_info or record.exc_text:
+            corpo["excecao"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(corpo, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legível, com os campos de extra={"dados": {...}} ao fim como chave=valor."""
+
+    def format(self, record):
+        linha = super().format(record)
+        dados = getattr(record, "dados", None)
+        if dados:
+            linha += " " + " ".join(f"{chave}={valor}" for chave, valor in dados.items())
+        return linha
+
+
+def configure_logging(segredos=()):
+    """
+    Configura o logging do processo a partir de LOG_LEVEL (padrão: INFO) e LOG_FORMAT
+    ("texto" ou "json"). Os segredos dados nunca aparecem nas mensagens.
+    """
+    handler = logging.StreamHandler()
+    if os.getenv('LOG_FORMAT', 'texto').lower() == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(TextFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    handler.addFilter(RedactSecretsFilter(segredos))
+
+    raiz = logging.getLogger()
+    for anterior in [h for h in raiz.handlers if getattr(h, "_roteiros", False)]:
+        raiz.removeHandler(anterior)
+    handler._roteiros = True
+    raiz.addHandler(handler)
+    raiz.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
@@ -0,0 +1,243 @@
+import bisect
+import contextvars
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pares):
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + "}"
+
+
+def _numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Counter:
+    """Contador monotônico com labels, no formato de texto do Prometheus."""
+
+    tipo = "counter"
+
+    def __init__(self, nome, ajuda, labels=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.labels = tuple(labels)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, valor=1, **labels):
+        chave = tuple(str(labels.get(nome, "")) for nome in self.labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def samples(self):
+        with self._lock:
+            return [(self.nome, list(zip(self.labels, chave)), valor) for chave, valor in sorted(self._valores.items())]
+
+
+class Histogram:
+    """Histograma com buckets cumulativos, soma e contagem por combinação de labels."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome, ajuda, labels=(), buckets=BUCKETS_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, valor, **labels):
+        chave = tuple(str(labels.get(nome, "")) for nome in self.labels)
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * len(self.buckets), 0.0, 0]
+            if indice < len(self.buckets):
+                serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def samples(self):
+        amostras = []
+        with self._lock:
+            for chave, (contagens, soma, total) in sorted(self._series.items()):
+                pares = list(zip(self.labels, chave))
+                acumulado = 0
+                for limite, contagem in zip(self.buckets, contagens):
+                    acumulado += contagem
+                    amostras.append((f"{self.nome}_bucket", pares + [("le", _numero(float(limite)))], acumulado))
+                amostras.append((f"{self.nome}_bucket", pares + [("le", "+Inf")], total))
+                amostras.append((f"{self.nome}_sum", pares, soma))
+                amostras.append((f"{self.nome}_count", pares, total))
+        return amostras
+
+
+class Registry:
+    """
+    Conjunto das métricas do processo, exportadas por render() no formato de texto do
+    Prometheus. Coletores são funções chamadas a cada exportação que retornam famílias
+    (nome, tipo, ajuda, [(labels, valor)]), para expor contadores que já existem em
+    outros objetos (caches, jobs) sem duplicá-los.
+    """
+
+    def __init__(self):
+        self._metricas = []
+        self._coletores = []
+        self._lock = threading.Lock()
+
+    def counter(self, nome, ajuda, labels=()):
+        return self._registrar(Counter(nome, ajuda, labels))
+
+    def histogram(self, nome, ajuda, labels=(), buckets=BUCKETS_PADRAO):
+        return self._registrar(Histogram(nome, ajuda, labels, buckets))
+
+    def _registrar(self, metrica):
+        with self._lock:
+            self._metricas.append(metrica)
+        return metrica
+
+    def collector(self, funcao):
+        with self._lock:
+            self._coletores.append(funcao)
+        return funcao
+
+    def render(self):
+        linhas = []
+        with self._lock:
+            metricas = list(self._metricas)
+            coletores = list(self._coletores)
+        for metrica in metricas:
+            linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            for nome, pares, valor in metrica.samples():
+                linhas.append(f"{nome}{_labels(pares)} {_numero(valor)}")
+        for coletor in coletores:
+            try:
+                familias = list(coletor())
+            except Exception:
+                logger.exception("Falha no coletor de métricas %s", getattr(coletor, "__name__", coletor))
+                continue
+            for nome, tipo, ajuda, amostras in familias:
+                linhas.append(f"# HELP {nome} {ajuda}")
+                linhas.append(f"# TYPE {nome} {tipo}")
+                for labels, valor in amostras:
+                    linhas.append(f"{nome}{_labels(sorted(labels.items()))} {_numero(valor)}")
+        return "\n".join(linhas) + "\n"
+
+
+registry = Registry()
+
+ETAPAS = registry.histogram(
+    "roteiro_etapa_segundos", "Duração das etapas do pipeline de roteiros.", ("etapa",)
+)
+
+_perfil_atual = contextvars.ContextVar("perfil_atual", default=None)
+
+
+class Profile:
+    """Linha do tempo das etapas de uma requisição amostrada."""
+
+    def __init__(self, rota):
+        self.id = uuid.uuid4().hex[:16]
+        self.rota = rota
+        self.inicio = time.time()
+        self._t0 = time.perf_counter()
+        self.duracao_ms = None
+        self.status = None
+        self.etapas = []
+        self._lock = threading.Lock()
+
+    def add(self, etapa, inicio, segundos, dados):
+        with self._lock:
+            self.etapas.append({
+                "etapa": etapa,
+                "inicio_ms": round((inicio - self._t0) * 1000, 2),
+                "duracao_ms": round(segundos * 1000, 2),
+                **dados,
+            })
+
+    def finish(self, status):
+        self.status = status
+        self.duracao_ms = round((time.perf_counter() - self._t0) * 1000, 2)
+
+    def to_dict(self):
+        with self._lock:
+            etapas = sorted(self.etapas, key=lambda e: e["inicio_ms"])
+        return {
+            "id": self.id,
+            "rota": self.rota,
+            "inicio": self.inicio,
+            "duracao_ms": self.duracao_ms,
+            "status": self.status,
+            "etapas": etapas,
+        }
+
+
+class Profiler:
+    """
+    Amostra perfis de requisições: uma fração `taxa` delas (ou as que pedirem) grava
+    todas as etapas medidas com span, inclusive nas threads que herdam o contexto. Os
+    últimos `max_perfis` perfis ficam disponíveis em recent().
+    """
+
+    def __init__(self, taxa=0.0, max_perfis=50):
+        self.taxa = taxa
+        self._perfis = deque(maxlen=max_perfis)
+        self._random = random.Random()
+
+    def start(self, rota, forcar=False):
+        """Inicia o perfil da requisição atual, se amostrada; retorna o token para finish()."""
+        if not forcar and (self.taxa <= 0 or self._random.random() >= self.taxa):
+            return None
+        return _perfil_atual.set(Profile(rota))
+
+    def finish(self, token, status):
+        if token is None:
+            return
+        perfil = _perfil_atual.get()
+        _perfil_atual.reset(token)
+        if perfil is not None:
+            perfil.finish(status)
+            self._perfis.appendleft(perfil)
+
+    def recent(self):
+        return [perfil.to_dict() for perfil in list(self._perfis)]
+
+
+def record_span(etapa, segundos, **dados):
+    """Registra a duração de uma etapa: histograma, perfil da requisição (se amostrada) e log."""
+    ETAPAS.observe(segundos, etapa=etapa)
+    perfil = _perfil_atual.get()
+    if perfil is not None:
+        perfil.add(etapa, time.perf_counter() - segundos, segundos, dados)
+    logger.debug("Etapa %s: %.1f ms", etapa, segundos * 1000,
+                 extra={"dados": {"etapa": etapa, "duracao_ms": round(segundos * 1000, 2), **dados}})
+
+
+@contextmanager
+def span(etapa, **dados):
+    """Mede o bloco como a etapa dada; o dict entregue aceita dados extras para o perfil."""
+    inicio = time.perf_counter()
+    try:
+        yield dados
+    finally:
+        record_span(etapa, time.perf_counter() - inicio, **dados)
@@ -0,0 +1,310 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlite_store import SQLiteStore
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat, lng, precisao=7):
+    """Codifica lat/lng em geohash (precisão 7 ≈ células de 150 m)."""
+    intervalo_lat = [-90.0, 90.0]
+    intervalo_lng = [-180.0, 180.0]
+    caracteres = []
+    bits = 0
+    valor = 0
+    usar_lng = True
+    while len(caracteres) < precisao:
+        intervalo, coordenada = (intervalo_lng, lng) if usar_lng else (intervalo_lat, lat)
+        meio = (intervalo[0] + intervalo[1]) / 2
+        valor <<= 1
+        if coordenada >= meio:
+            valor |= 1
+            intervalo[0] = meio
+        else:
+            intervalo[1] = meio
+        usar_lng = not usar_lng
+        bits += 1
+        if bits == 5:
+            caracteres.append(_GEOHASH_BASE32[valor])
+            bits = 0
+            valor = 0
+    return "".join(caracteres)
+
+
+class PlaceIndex(SQLiteStore):
+    """
+    Índice local, em SQLite, dos lugares coletados na Places API por destino.
+
+    Guarda as coordenadas de cada destino, os lugares (com tipos, price_level, coordenadas
+    e geohash, indexados por destino, tipo e nível de preço) e, para cada consulta
+    (query, max_price) já feita, a lista ordenada dos lugares de cada página e se há
+    página seguinte (o next_page_token não é guardado: expira em minutos). Assim uma página fresca (com menos de `ttl` segundos) é
+    respondida localmente com exatamente os mesmos lugares da chamada original. A cada
+    `purge_every` páginas gravadas, o que venceu é removido (ver purge_expired).
+    """
+
+    def __init__(self, db_path, ttl=7 * 24 * 3600, purge_every=500):
+        super().__init__(db_path, purge_every)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._contadores = {"hits": 0, "misses": 0}
+        self._init_db()
+        self.purge_expired()
+
+    def _init_db(self):
+        conn = self._conexao()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS destinos ("
+            " destino TEXT PRIMARY KEY,"
+            " coordenadas TEXT NOT NULL,"
+            " atualizado_em REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS lugares ("
+            " destino TEXT NOT NULL,"
+            " place_id TEXT NOT NULL,"
+            " nome TEXT,"
+            " price_level INTEGER,"
+            " lat REAL,"
+            " lng REAL,"
+            " geohash TEXT,"
+            " dados TEXT NOT NULL,"
+            " atualizado_em REAL NOT NULL,"
+            " PRIMARY KEY (destino, place_id));"
+            "CREATE INDEX IF NOT EXISTS idx_lugares_preco ON lugares (destino, price_level);"
+            "CREATE INDEX IF NOT EXISTS idx_lugares_geohash ON lugares (destino, geohash);"
+            "CREATE TABLE IF NOT EXISTS lugar_tipos ("
+            " destino TEXT NOT NULL,"
+            " tipo TEXT NOT NULL,"
+            " place_id TEXT NOT NULL,"
+            " PRIMARY KEY (destino, tipo, place_id));"
+        )
+        colunas = [linha[1] for linha in conn.execute("PRAGMA table_info(consultas)")]
+        if colunas and "mais_paginas" not in colunas:
+            # Índice criado antes da paginação, ou que guardava tokens: as consultas são recoletadas
+            conn.execute("DROP TABLE consultas")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS consultas ("
+            " destino TEXT NOT NULL,"
+            " query TEXT NOT NULL,"
+            " max_price INTEGER NOT NULL,"
+            " pagina INTEGER NOT NULL,"
+            " place_ids TEXT NOT NULL,"
+            " mais_paginas INTEGER NOT NULL,"
+            " atualizado_em REAL NOT NULL,"
+            " PRIMARY KEY (destino, query, max_price, pagina))"
+        )
+        conn.commit()
+
+    def _contar(self, evento):
+        with self._lock:
+            self._contadores[evento] += 1
+
+    @staticmethod
+    def _preco(max_price):
+        # -1 representa "sem restrição de preço" na chave primária
+        return -1 if max_price is None else max_price
+
+    def get_coordinates(self, destino):
+        """Coordenadas "lat,lng" do destino, ou None se ausentes ou vencidas."""
+        linha = self._conexao().execute(
+            "SELECT coordenadas FROM destinos WHERE destino = ? AND atualizado_em > ?",
+            (destino, time.time() - self.ttl)
+        ).fetchone()
+        return linha[0] if linha else None
+
+    def set_coordinates(self, destino, coordenadas):
+        conn = self._conexao()
+        conn.execute(
+            "INSERT OR REPLACE INTO destinos (destino, coordenadas, atualizado_em) VALUES (?, ?, ?)",
+            (destino, coordenadas, time.time())
+        )
+        conn.commit()
+
+    def get_query(self, destino, query, max_price=None, pagina=1):
+        """
+        (lugares, mais_paginas) de uma página da consulta, com os lugares na ordem
+        original, ou None se a página estiver ausente ou vencida.
+        """
+        conn = self._conexao()
+        linha = conn.execute(
+            "SELECT place_ids, mais_paginas FROM consultas"
+            " WHERE destino = ? AND query = ? AND max_price = ? AND pagina = ? AND atualizado_em > ?",
+            (destino, query, self._preco(max_price), pagina, time.time() - self.ttl)
+        ).fetchone()
+        if linha is None:
+            self._contar("misses")
+            return None
+        place_ids = json.loads(linha[0])
+        dados = {}
+        # Lotes de 500 para ficar abaixo do limite de parâmetros do SQLite
+        for inicio in range(0, len(place_ids), 500):
+            lote = place_ids[inicio:inicio + 500]
+            marcadores = ",".join("?" * len(lote))
+            for place_id, valor in conn.execute(
+                f"SELECT place_id, dados FROM lugares WHERE destino = ? AND place_id IN ({marcadores})",
+                (destino, *lote)
+            ):
+                dados[place_id] = valor
+        if len(dados) < len(set(place_ids)):
+            # Lugar removido do índice: a consulta precisa ser refeita
+            self._contar("misses")
+            return None
+        self._contar("hits")
+        return [json.loads(dados[place_id]) for place_id in place_ids], bool(linha[1])
+
+    def store_query(self, destino, query, max_price, lugares, pagina=1, mais_paginas=False):
+        """Grava os lugares de uma página da consulta (e a própria página) no índice."""
+        agora = time.time()
+        lugares = [lugar for lugar in lugares if lugar.get('place_id')]
+        conn = self._conexao()
+        with conn:
+            for lugar in lugares:
+                localizacao = lugar.get('geometry', {}).get('location', {})
+                lat, lng = localizacao.get('lat'), localizacao.get('lng')
+                conn.execute(
+                    "INSERT OR REPLACE INTO lugares"
+                    " (destino, place_id, nome, price_level, lat, lng, geohash, dados, atualizado_em)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        destino, lugar['place_id'], lugar.get('name'), lugar.get('price_level'), lat, lng,
+                        geohash(lat, lng) if lat is not None and lng is not None else None,
+                        json.dumps(lugar, ensure_ascii=False), agora,
+                    )
+                )
+                conn.execute("DELETE FROM lugar_tipos WHERE destino = ? AND place_id = ?", (destino, lugar['place_id']))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO lugar_tipos (destino, tipo, place_id) VALUES (?, ?, ?)",
+                    [(destino, tipo, lugar['place_id']) for tipo in lugar.get('types', [])]
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO consultas"
+                " (destino, query, max_price, pagina, place_ids, mais_paginas, atualizado_em)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    destino, query, self._preco(max_price), pagina,
+                    json.dumps([lugar['place_id'] for lugar in lugares]), int(mais_paginas), agora,
+                )
+            )
+        self._registrar_gravacao()
+
+    def find_places(self, destino, tipo=None, max_price_level=None, geohash_prefixo=None, limite=200):
+        """
+        Lugares do destino no índice, opcionalmente filtrados por tipo do Google, nível de
+        preço máximo (lugares sem price_level entram) e prefixo de geohash.
+        """
+        sql = "SELECT l.place_id, l.nome, l.price_level, l.lat, l.lng, l.geohash FROM lugares l"
+        condicoes = ["l.destino = ?"]
+        params = [destino]
+        if tipo:
+            sql += " JOIN lugar_tipos t ON t.destino = l.destino AND t.place_id = l.place_id AND t.tipo = ?"
+            params.insert(0, tipo)
+        if max_price_level is not None:
+            condicoes.append("(l.price_level IS NULL OR l.price_level <= ?)")
+            params.append(max_price_level)
+        if geohash_prefixo:
+            condicoes.append("l.geohash >= ? AND l.geohash < ?")
+            params.extend([geohash_prefixo, geohash_prefixo + "~"])
+        sql += " WHERE " + " AND ".join(condicoes) + " ORDER BY l.nome LIMIT ?"
+        params.append(limite)
+        colunas = ("place_id", "nome", "price_level", "lat", "lng", "geohash")
+        return [dict(zip(colunas, linha)) for linha in self._conexao().execute(sql, params)]
+
+    def purge_expired(self):
+        """Remove do índice consultas e destinos vencidos e os lugares que nenhuma consulta usa."""
+        limite = time.time() - self.ttl
+        conn = self._conexao()
+        with conn:
+            conn.execute("DELETE FROM consultas WHERE atualizado_em <= ?", (limite,))
+            conn.execute("DELETE FROM destinos WHERE atualizado_em <= ?", (limite,))
+            cursor = conn.execute("DELETE FROM lugares WHERE atualizado_em <= ?", (limite,))
+            conn.execute(
+                "DELETE FROM lugar_tipos WHERE NOT EXISTS ("
+                " SELECT 1 FROM lugares l WHERE l.destino = lugar_tipos.destino AND l.place_id = lugar_tipos.place_id)"
+            )
+        return cursor.rowcount
+
+    def stats(self):
+        conn = self._conexao()
+        with self._lock:
+            contadores = dict(self._contadores)
+        return {
+            "destinos": conn.execute("SELECT COUNT(*) FROM destinos").fetchone()[0],
+            "lugares": conn.execute("SELECT COUNT(*) FROM lugares").fetchone()[0],
+            "consultas": conn.execute("SELECT COUNT(*) FROM consultas").fetchone()[0],
+            "ttl": self.ttl,
+            **contadores,
+        }
+
+
+def crawl_destination(indice, destino, get_coordinates, search_places, consultas, forcar=False, workers=4, max_paginas=3):
+    """
+    Aquece o índice para um destino: geocodifica e executa as páginas (até max_paginas) das
+    consultas (query, max_price) ainda ausentes ou vencidas (todas, com forcar=True), com
+    até `workers` consultas simultâneas. Como o índice não guarda next_page_token, uma
+    consulta com alguma página faltando é refeita desde a 1ª página. search_places
+    recebe e devolve o cursor da página seguinte como app.search_places. Retorna o resumo {"destino", "consultas",
+    "paginas_executadas", "paginas_frescas", "vazias", "lugares"}.
+    """
+    coordenadas = None if forcar else indice.get_coordinates(destino)
+    if coordenadas is None:
+        coordenadas = get_coordinates(destino)
+        if not coordenadas:
+            return {"destino": destino, "erro": "destino não encontrado"}
+        indice.set_coordinates(destino, coordenadas)
+    location_bias = f"point:{coordenadas}"
+
+    def executar(query, max_price):
+        if not forcar:
+            frescas = 0
+            for pagina in range(1, max_paginas + 1):
+                registro = indice.get_query(destino, query, max_price, pagina)
+                if registro is None:
+                    break
+                frescas += 1
+                if not registro[1]:
+                    return 0, frescas, False
+            else:
+                return 0, frescas, False
+
+        kwargs = {"max_price": max_price} if max_price is not None else {}
+        executadas = 0
+        cursor = None
+        for pagina in range(1, max_paginas + 1):
+            if cursor:
+                kwargs["page_token"] = cursor
+            lugares, cursor = search_places(query, location_bias=location_bias, **kwargs)
+            executadas += 1
+            # Listas vazias podem ser falhas da API (search_places não diferencia): não são gravadas
+            if not lugares:
+                return executadas, 0, pagina == 1
+            indice.store_query(destino, query, max_price, lugares, pagina, mais_paginas=cursor is not None)
+            if not cursor:
+                break
+        return executadas, 0, False
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        resultados = list(executor.map(lambda consulta: executar(*consulta), consultas))
+
+    return {
+        "destino": destino,
+        "consultas": len(consultas),
+        "paginas_executadas": sum(r[0] for r in resultados),
+        "paginas_frescas": sum(r[1] for r in resultados),
+        "vazias": sum(1 for r in resultados if r[2]),
+        "lugares": len(indice.find_places(destino, limite=-1)),
+    }
+
+
+def index_from_env():
+    """Cria o índice de lugares a partir das variáveis de ambiente (None se desativado)."""
+    db_path = os.getenv('PLACE_INDEX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'place_index.sqlite3'))
+    if not db_path:
+        return None
+    return PlaceIndex(
+        db_path,
+        ttl=int(os.getenv('PLACE_INDEX_TTL', str(7 * 24 * 3600))),
+        purge_every=int(os.getenv('PLACE_INDEX_PURGE_EVERY', '500')),
+    )
@@ -0,0 +1,219 @@
+from constants import INTERESTS_TO_PLACE_TYPES
+
+# Consultas específicas por interesse: (modelo da query, tema, usa restrição de preço).
+# Consultas com o mesmo tema buscam essencialmente os mesmos lugares e são fundidas no plano.
+QUERIES_POR_INTERESSE = {
+    "praias": [
+        ("praias em {destino}", "beach", True),
+        ("orla de {destino}", "orla", True),
+        ("piscinas naturais em {destino}", "piscinas_naturais", True),
+    ],
+    # Museus e história são buscados sem restrição de preço inicial
+    "museus": [
+        ("museu {destino}", "museum", False),
+        ("galeria de arte {destino}", "art_gallery", False),
+        ("centro cultural {destino}", "centro_cultural", False),
+        ("sítio histórico {destino}", "historic_site", False),
+        ("casa de cultura {destino}", "casa_de_cultura", False),
+        ("atrações culturais em {destino}", "atracoes_culturais", False),
+    ],
+    "gastronomia": [
+        ("melhores restaurantes em {destino}", "restaurant", True),
+        ("bares e restaurantes em {destino}", "bares_e_restaurantes", True),
+        ("cafes em {destino}", "cafe", True),
+        ("padarias e docerias em {destino}", "bakery", True),
+    ],
+    "natureza": [
+        ("parques naturais em {destino}", "parques_naturais", True),
+        ("reservas ecológicas em {destino}", "reservas_ecologicas", True),
+        ("trilhas em {destino}", "trilhas", True),
+        ("jardins botânicos em {destino}", "jardins_botanicos", True),
+    ],
+    "historia": [
+        ("pontos históricos em {destino}", "historic_site", False),
+        ("igrejas históricas em {destino}", "church", False),
+        ("monumentos históricos em {destino}", "monumentos_historicos", False),
+    ],
+}
+
+# Buscas gerais feitas para todo destino, sem restrição de preço
+QUERIES_GERAIS = [
+    ("atrações turísticas em {destino}", "tourist_attraction", False),
+    ("melhores lugares para visitar em {destino}", "melhores_lugares", False),
+    ("pontos turísticos em {destino}", "pontos_turisticos", False),
+]
+
+
+def queries_for_interest(interesse):
+    """Retorna os modelos de consulta de um interesse (específicos ou derivados dos tipos do Google)."""
+    if interesse in QUERIES_POR_INTERESSE:
+        return QUERIES_POR_INTERESSE[interesse]
+    return [
+        (f"{place_type.replace('_', ' ')} em {{destino}}", place_type, True)
+        for place_type in INTERESTS_TO_PLACE_TYPES.get(interesse, [])
+    ]
+
+
+def crawl_queries(destino, niveis_preco=(1, 2, 3, 4)):
+    """
+    Todas as consultas (query, max_price) que um plano de build_query_plan pode conter para
+    o destino, considerando todos os interesses e os níveis de preço dados.
+
+    Além de cada modelo com o seu nível de preço, inclui a variante sem restrição de preço
+    dos modelos cujo tema também aparece sem restrição, já que a fusão por tema pode
+    produzir essa combinação.
+    """
+    modelos = [modelo for interesse in INTERESTS_TO_PLACE_TYPES for modelo in queries_for_interest(interesse)]
+    modelos.extend(QUERIES_GERAIS)
+    temas_sem_preco = {tema for _, tema, com_preco in modelos if not com_preco}
+
+    consultas = []
+    vistas = set()
+    for modelo, tema, com_preco in modelos:
+        query = modelo.format(destino=destino)
+        precos = list(niveis_preco) if com_preco else []
+        if not com_preco or tema in temas_sem_preco:
+            precos.append(None)
+        for max_price in precos:
+            if (query, max_price) not in vistas:
+                vistas.add((query, max_price))
+                consultas.append((query, max_price))
+    return consultas
+
+
+class PlannedQuery:
+    """Uma consulta à Places API no plano de uma requisição."""
+
+    def __init__(self, query, tema, max_price, rodada, origens):
+        self.query = query
+        self.tema = tema
+        self.max_price = max_price
+        self.rodada = rodada
+        self.origens = origens
+        self.status = "planejada"
+        self.resultados = 0
+        self.paginas = 0
+        self.paginas_fora_do_orcamento = False
+
+    @property
+    def kwargs(self):
+        return {"max_price": self.max_price} if self.max_price is not None else {}
+
+    def to_dict(self):
+        return {
+            "query": self.query,
+            "tema": self.tema,
+            "max_price": self.max_price,
+            "origens": self.origens,
+            "status": self.status,
+            "resultados": self.resultados,
+            "paginas": self.paginas,
+            "paginas_fora_do_orcamento": self.paginas_fora_do_orcamento,
+        }
+
+
+class QueryPlan:
+    """
+    Plano de consultas deduplicado e priorizado, com orçamento de chamadas e alvo de
+    candidatos (lugares únicos com score suficiente para o roteiro). chamadas soma o que
+    a coleta cobrou do orçamento: uma por página buscada, inclusive as seguintes à 1ª,
+    venha ela do cache ou não. renovacoes_de_token conta à parte as chamadas feitas
+    para obter um next_page_token novo.
+    """
+
+    def __init__(self, consultas, consultas_brutas, orcamento, alvo_candidatos):
+        self.consultas = consultas
+        self.consultas_brutas = consultas_brutas
+        self.orcamento = orcamento
+        self.alvo_candidatos = alvo_candidatos
+        self.candidatos_coletados = 0
+        self.candidatos_relevantes = 0
+        self.paginas_extras = 0
+        self.chamadas = 0
+        self.renovacoes_de_token = 0
+        self.paginas_com_falha = 0
+
+    @property
+    def completo(self):
+        """Se a coleta terminou sem páginas com erro (inclusive de quota) ou estouradas no tempo."""
+        return self.paginas_com_falha == 0 and not any(c.status in ("erro", "timeout") for c in self.consultas)
+
+    @property
+    def executaveis(self):
+        """Consultas dentro do orçamento, na ordem de prioridade."""
+        return [c for c in self.consultas if c.status != "fora_do_orcamento"]
+
+    def resumo(self):
+        executadas = sum(1 for c in self.consultas if c.status in ("executada", "erro", "timeout"))
+        return {
+            "consultas_brutas": self.consultas_brutas,
+            "consultas_planejadas": len(self.consultas),
+            "consultas_no_orcamento": len(self.executaveis),
+            "consultas_executadas": executadas,
+            "paginas_extras": self.paginas_extras,
+            "paginas_com_falha": self.paginas_com_falha,
+            "consultas_com_paginas_fora_do_orcamento": sum(1 for c in self.consultas if c.paginas_fora_do_orcamento),
+            "chamadas": self.chamadas,
+            "renovacoes_de_token": self.renovacoes_de_token,
+            "chamadas_economizadas": self.consultas_brutas - self.chamadas,
+            "orcamento_chamadas": self.orcamento,
+            "alvo_candidatos": self.alvo_candidatos,
+            "candidatos_coletados": self.candidatos_coletados,
+            "candidatos_relevantes": self.candidatos_relevantes,
+        }
+
+    def to_dict(self):
+        return {"resumo": self.resumo(), "consultas": [c.to_dict() for c in self.consultas]}
+
+
+def _preco_menos_restritivo(a, b):
+    if a is None or b is None:
+        return None
+    return max(a, b)
+
+
+def build_query_plan(destino, interesses, tipo_viajante, max_price_level, dias_viagem,
+                     pesos_viajante=None, orcamento=24, fator_candidatos=2):
+    """
+    Transforma os parâmetros da requisição em um plano de consultas.
+
+    Consultas com o mesmo tema são fundidas (mantendo a restrição de preço menos
+    restritiva), e a prioridade é dada por rodadas: a 1ª consulta de cada interesse,
+    depois a 2ª, e assim por diante, com as buscas gerais ao fim de cada rodada. Dentro
+    de uma rodada, temas com maior peso para o tipo de viajante vêm antes. Consultas além
+    do orçamento ficam marcadas como "fora_do_orcamento".
+    """
+    pesos_viajante = pesos_viajante or {}
+    grupos = []
+    vistos = set()
+    for interesse in interesses:
+        if interesse in vistos:
+            continue
+        vistos.add(interesse)
+        grupos.append((interesse, queries_for_interest(interesse)))
+    grupos.append(("geral", QUERIES_GERAIS))
+
+    consultas_brutas = 0
+    por_tema = {}
+    candidatas = []
+    for indice_grupo, (origem, modelos) in enumerate(grupos):
+        for rodada, (modelo, tema, com_preco) in enumerate(modelos):
+            consultas_brutas += 1
+            max_price = max_price_level if com_preco else None
+            existente = por_tema.get(tema)
+            if existente:
+                existente.max_price = _preco_menos_restritivo(existente.max_price, max_price)
+                existente.rodada = min(existente.rodada, rodada)
+                if origem not in existente.origens:
+                    existente.origens.append(origem)
+                continue
+            consulta = PlannedQuery(modelo.format(destino=destino), tema, max_price, rodada, [origem])
+            por_tema[tema] = consulta
+            candidatas.append((indice_grupo, consulta))
+
+    candidatas.sort(key=lambda item: (item[1].rodada, -pesos_viajante.get(item[1].tema, 0), item[0]))
+    consultas = [consulta for _, consulta in candidatas]
+    for consulta in consultas[orcamento:]:
+        consulta.status = "fora_do_orcamento"
+
+    return QueryPlan(consultas, consultas_brutas, orcamento, int(dias_viagem * 3 * fator_candidatos))
@@ -0,0 +1,125 @@
+import heapq
+
+PERIODOS = ("dia_inteiro", "noite", "manha", "tarde")
+
+
+class _Fila:
+    """Heap de posições (ranks) com remoção preguiçosa dos itens já usados."""
+
+    def __init__(self, ranks):
+        self._heap = list(ranks)
+        heapq.heapify(self._heap)
+
+    def topo(self, usados):
+        heap = self._heap
+        while heap and heap[0] in usados:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+
+class SlotScheduler:
+    """
+    Distribui os pontos pelos slots de manhã, tarde e noite de cada dia.
+
+    Os pontos (scoring.Candidate) devem vir ordenados por score (decrescente); a posição
+    de cada ponto nessa lista é a sua prioridade. Para cada período é mantida uma fila de
+    prioridade com os pontos que o aceitam, e mais duas filas por duração (até 3h e até 4h)
+    para completar os slots que sobrarem; com agrupamento geográfico, há um conjunto de
+    filas por região.
+    Pontos usados são descartados das filas de forma preguiçosa, então o custo total é
+    O(N log N + dias * log N), e sem agrupamento as escolhas são as mesmas do laço
+    original que reordenava e varria a lista inteira a cada dia.
+    """
+
+    def __init__(self, itens, grupos=None):
+        self.itens = itens
+        self.usados = set()
+        self.filas = self._montar_filas(range(len(itens)))
+        # Filas por região (grupos[rank]), consultadas antes das filas globais
+        self.filas_por_grupo = {}
+        if grupos:
+            ranks_por_grupo = {}
+            for rank, grupo in enumerate(grupos):
+                if grupo is not None:
+                    ranks_por_grupo.setdefault(grupo, []).append(rank)
+            self.filas_por_grupo = {grupo: self._montar_filas(ranks) for grupo, ranks in ranks_por_grupo.items()}
+
+    def _montar_filas(self, ranks):
+        por_nome = {nome: [] for nome in PERIODOS + ("ate_3h", "ate_4h")}
+        for rank in ranks:
+            ponto = self.itens[rank]
+            for periodo in set(ponto.melhor_periodo_dia):
+                if periodo in por_nome:
+                    por_nome[periodo].append(rank)
+            if ponto.duracao_horas <= 3:
+                por_nome["ate_3h"].append(rank)
+            if ponto.duracao_horas <= 4:
+                por_nome["ate_4h"].append(rank)
+        return {nome: _Fila(lista) for nome, lista in por_nome.items()}
+
+    def _usar(self, nome, grupo=None):
+        rank = None
+        if grupo in self.filas_por_grupo:
+            rank = self.filas_por_grupo[grupo][nome].topo(self.usados)
+        if rank is None:
+            rank = self.filas[nome].topo(self.usados)
+        if rank is None:
+            return None
+        self.usados.add(rank)
+        return self.itens[rank]
+
+    def next_day(self, grupo=None):
+        """
+        Monta o próximo dia: {"manha", "tarde", "noite", "dia_inteiro"}.
+
+        Com um grupo (região), cada slot é preenchido primeiro com pontos dessa região e,
+        só se ela não tiver candidatos para o slot, com os demais pontos.
+        """
+        manha = self._usar("dia_inteiro", grupo)
+        dia_inteiro = manha is not None
+        tarde = None
+        noite = self._usar("noite", grupo)
+        if not dia_inteiro:
+            manha = self._usar("manha", grupo)
+            tarde = self._usar("tarde", grupo)
+
+        # Slots vazios recebem o ponto restante de maior score que couber
+        # (manhã e noite até 3h, tarde até 4h), na ordem manhã, tarde, noite.
+        while True:
+            manha_livre = manha is None
+            tarde_livre = tarde is None and not dia_inteiro
+            noite_livre = noite is None
+            if tarde_livre:
+                nome_fila = "ate_4h"
+            elif manha_livre or noite_livre:
+                nome_fila = "ate_3h"
+            else:
+                break
+            ponto = self._usar(nome_fila, grupo)
+            if ponto is None:
+                break
+            if manha_livre and ponto.duracao_horas <= 3:
+                manha = ponto
+            elif tarde_livre:
+                tarde = ponto
+            else:
+                noite = ponto
+
+        return {"manha": manha, "tarde": tarde, "noite": noite, "dia_inteiro": dia_inteiro}
+
+
+def iter_days(itens, dias_viagem, grupos=None, grupos_por_dia=None):
+    """
+    Gera a distribuição dos pontos (ordenados por score) dia a dia, sob demanda.
+
+    grupos/grupos_por_dia (ver spatial.cluster_days) fazem cada dia preferir os pontos
+    da sua região; sem eles, a escolha é feita apenas pelo score.
+    """
+    scheduler = SlotScheduler(itens, grupos)
+    for indice in range(dias_viagem):
+        yield scheduler.next_day(grupos_por_dia[indice] if grupos_por_dia else None)
+
+
+def schedule_days(itens, dias_viagem, grupos=None, grupos_por_dia=None):
+    """Gera a distribuição dos pontos para todos os dias da viagem (ver iter_days)."""
+    return list(iter_days(itens, dias_viagem, grupos, grupos_por_dia))
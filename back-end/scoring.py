@@ -0,0 +1,217 @@
+import random
+
+try:
+    import numpy as np
+except ImportError:  # Sem NumPy, a pontuação usa só as máscaras de bits
+    np = None
+
+from constants import INTERESTS_TO_PLACE_TYPES, PRICE_LEVEL_MAP, TIPO_VIAJANTE_PESOS
+
+# Tipos do Google usados nas regras de duração e de período do dia
+TIPOS_CULTURAIS = ["museum", "art_gallery", "historic_site"]
+TIPOS_LONGA_DURACAO = ["shopping_mall", "amusement_park", "park", "zoo"]
+TIPOS_NATUREZA = ["beach", "natural_feature"]
+TIPOS_CURTA_DURACAO = ["restaurant", "food", "bar", "night_club"]
+TIPOS_NOTURNOS = ["night_club", "bar"]
+TIPOS_REFEICAO = ["restaurant", "food", "cafe"]
+TIPOS_RESTAURANTE = ["restaurant", "food"]
+
+# Score mínimo para um lugar entrar no roteiro
+SCORE_MINIMO = 30
+
+# Vocabulário de tipos relevantes: tipos fora dele não alteram score, duração nem período.
+_VOCABULARIO = []
+for _tipos in (
+    *INTERESTS_TO_PLACE_TYPES.values(),
+    *(pesos.keys() for pesos in TIPO_VIAJANTE_PESOS.values()),
+    TIPOS_CULTURAIS, TIPOS_LONGA_DURACAO, TIPOS_NATUREZA, TIPOS_CURTA_DURACAO,
+    TIPOS_NOTURNOS, TIPOS_REFEICAO, TIPOS_RESTAURANTE, ["dinner", "amusement_park"],
+):
+    for _tipo in _tipos:
+        if _tipo not in _VOCABULARIO:
+            _VOCABULARIO.append(_tipo)
+TYPE_BITS = {tipo: 1 << indice for indice, tipo in enumerate(_VOCABULARIO)}
+
+
+def types_mask(tipos):
+    """Converte uma lista de tipos do Google na máscara de bits do vocabulário."""
+    mascara = 0
+    for tipo in tipos:
+        mascara |= TYPE_BITS.get(tipo, 0)
+    return mascara
+
+
+INTEREST_MASKS = {interesse: types_mask(tipos) for interesse, tipos in INTERESTS_TO_PLACE_TYPES.items()}
+TRAVELER_WEIGHTS = {
+    tipo_viajante: [(TYPE_BITS[tipo], peso) for tipo, peso in pesos.items()]
+    for tipo_viajante, pesos in TIPO_VIAJANTE_PESOS.items()
+}
+
+MASK_CULTURAL = types_mask(TIPOS_CULTURAIS)
+MASK_LONGA_DURACAO = types_mask(TIPOS_LONGA_DURACAO)
+MASK_NATUREZA = types_mask(TIPOS_NATUREZA)
+MASK_CURTA_DURACAO = types_mask(TIPOS_CURTA_DURACAO)
+MASK_NOTURNO = types_mask(TIPOS_NOTURNOS)
+MASK_REFEICAO = types_mask(TIPOS_REFEICAO)
+MASK_RESTAURANTE = types_mask(TIPOS_RESTAURANTE)
+BIT_DINNER = TYPE_BITS["dinner"]
+BIT_AMUSEMENT_PARK = TYPE_BITS["amusement_park"]
+
+if np is not None:
+    _INTEREST_NAMES = list(INTEREST_MASKS)
+    _INTEREST_MASK_ARRAY = np.array([INTEREST_MASKS[i] for i in _INTEREST_NAMES], dtype=np.int64)
+    _BIT_SHIFTS = np.arange(len(_VOCABULARIO), dtype=np.int64)
+    _TRAVELER_VECTORS = {
+        tipo_viajante: np.array([pesos.get(tipo, 0) for tipo in _VOCABULARIO], dtype=np.int64)
+        for tipo_viajante, pesos in TIPO_VIAJANTE_PESOS.items()
+    }
+
+
+class Candidate:
+    """Lugar candidato ao roteiro, com os tipos do Google guardados como máscara de bits."""
+
+    __slots__ = ("place_id", "nome", "tipos", "price_level", "lat", "lng",
+                 "score", "duracao_horas", "melhor_periodo_dia")
+
+    def __init__(self, place_id, nome, tipos, price_level=None, lat=None, lng=None):
+        self.place_id = place_id
+        self.nome = nome
+        self.tipos = tipos
+        self.price_level = price_level
+        self.lat = lat
+        self.lng = lng
+        self.score = 0
+        self.duracao_horas = 2
+        self.melhor_periodo_dia = ["manha", "tarde"]
+
+    @classmethod
+    def from_place(cls, place):
+        localizacao = place.get('geometry', {}).get('location', {})
+        return cls(
+            place.get('place_id'),
+            place.get('name', 'Ponto Desconhecido'),
+            types_mask(place.get('types', [])),
+            place.get('price_level', None),
+            localizacao.get('lat'),
+            localizacao.get('lng'),
+        )
+
+    @property
+    def custo_detalhado(self):
+        return PRICE_LEVEL_MAP.get(self.price_level, "Não Informado")
+
+    @property
+    def custo_estimado(self):
+        if self.price_level is None:
+            return "desconhecido"
+        if self.price_level >= 3:
+            return "alto"
+        if self.price_level == 2:
+            return "medio"
+        return "baixo"
+
+    @property
+    def interesses(self):
+        return [interesse for interesse, mascara in INTEREST_MASKS.items() if self.tipos & mascara]
+
+
+def _apply_price_and_floor(score, price_level, max_price_level):
+    # Penalidade se o preço for muito acima do orçamento do usuário
+    if price_level is not None and price_level > max_price_level:
+        score = max(0, score - (price_level - max_price_level) * 10)
+    # Pontuação base mínima para garantir que o item seja considerado
+    if score == 0:
+        return 10
+    if score < 25:
+        return 25
+    return score
+
+
+def _batch_scores_numpy(candidatos, interesses_usuario, tipo_viajante, max_price_level):
+    mascaras = np.array([c.tipos for c in candidatos], dtype=np.int64)
+
+    # SUPER IMPULSO: +200 por interesse do usuário (contando repetições) com algum tipo em comum
+    contagem = np.array([interesses_usuario.count(i) for i in _INTEREST_NAMES], dtype=np.int64)
+    correspondencias = (mascaras[:, None] & _INTEREST_MASK_ARRAY[None, :]) != 0
+    scores = 200 * (correspondencias @ contagem)
+
+    # Peso do tipo de viajante: matriz de incidência de tipos x vetor de pesos
+    if tipo_viajante in _TRAVELER_VECTORS:
+        incidencia = (mascaras[:, None] >> _BIT_SHIFTS[None, :]) & 1
+        scores = scores + incidencia @ _TRAVELER_VECTORS[tipo_viajante]
+
+    precos = np.array([-1 if c.price_level is None else c.price_level for c in candidatos], dtype=np.int64)
+    acima = (precos >= 0) & (precos > max_price_level)
+    scores = np.where(acima, np.maximum(0, scores - (precos - max_price_level) * 10), scores)
+    scores = np.where(scores == 0, 10, np.where(scores < 25, 25, scores))
+    return scores.tolist()
+
+
+def _batch_scores_python(candidatos, interesses_usuario, tipo_viajante, max_price_level):
+    mascaras_interesses = [INTEREST_MASKS[i] for i in interesses_usuario if i in INTEREST_MASKS]
+    pesos = TRAVELER_WEIGHTS.get(tipo_viajante, [])
+    scores = []
+    for c in candidatos:
+        score = 200 * sum(1 for mascara in mascaras_interesses if c.tipos & mascara)
+        score += sum(peso for bit, peso in pesos if c.tipos & bit)
+        scores.append(_apply_price_and_floor(score, c.price_level, max_price_level))
+    return scores
+
+
+def relevance_filter(interesses_usuario, tipo_viajante, max_price_level):
+    """
+    Retorna uma função que diz se um lugar da Places API atinge SCORE_MINIMO para a
+    requisição. O score não depende dos sorteios, então pode ser avaliado lugar a lugar
+    durante a coleta.
+    """
+    def relevante(place):
+        candidato = Candidate.from_place(place)
+        return _batch_scores_python([candidato], interesses_usuario, tipo_viajante, max_price_level)[0] >= SCORE_MINIMO
+    return relevante
+
+
+def score_places(places, interesses_usuario, tipo_viajante, max_price_level, rng=random):
+    """
+    Converte os lugares da Places API em candidatos pontuados, na mesma ordem de entrada.
+
+    Os scores são calculados de uma vez para todos os candidatos (com NumPy, quando
+    disponível). Duração e período do dia seguem as mesmas regras e a mesma sequência de
+    sorteios de antes, lugar a lugar, usando rng (um random.Random com semente torna o
+    resultado reprodutível).
+    """
+    candidatos = [Candidate.from_place(place) for place in places]
+    if not candidatos:
+        return candidatos
+
+    if np is not None:
+        scores = _batch_scores_numpy(candidatos, interesses_usuario, tipo_viajante, max_price_level)
+    else:
+        scores = _batch_scores_python(candidatos, interesses_usuario, tipo_viajante, max_price_level)
+
+    for candidato, score in zip(candidatos, scores):
+        candidato.score = score
+        tipos = candidato.tipos
+
+        duracao = 2
+        if tipos & MASK_CULTURAL:
+            duracao = rng.choice([2, 3])
+        if tipos & MASK_LONGA_DURACAO:
+            duracao = rng.choice([3, 4, 5])
+        if tipos & MASK_NATUREZA:
+            duracao = rng.choice([3, 4])
+        if tipos & MASK_CURTA_DURACAO:
+            duracao = rng.choice([1, 2])
+        candidato.duracao_horas = duracao
+
+        periodo = ["manha", "tarde"]
+        if tipos & MASK_NOTURNO:
+            periodo = ["noite"]
+        if tipos & MASK_REFEICAO:
+            periodo = rng.choice([["manha", "tarde"], ["tarde", "noite"]])
+        if tipos & MASK_RESTAURANTE and tipos & BIT_DINNER:
+            periodo.append("noite")
+        if tipos & BIT_AMUSEMENT_PARK:
+            periodo = ["dia_inteiro"]
+        candidato.melhor_periodo_dia = periodo
+
+    return candidatos
@@ -0,0 +1,49 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Compartilha a execução de chamadas idênticas entre threads.
+
+    A primeira thread a pedir uma chave executa a função; as demais que pedirem a mesma
+    chave enquanto ela roda esperam e recebem o mesmo resultado (ou a mesma exceção).
+    Com manter_resultados=True, resultados bem-sucedidos continuam disponíveis depois de
+    prontos (memoização, útil num lote); caso contrário, só chamadas em andamento são
+    compartilhadas.
+    """
+
+    def __init__(self, manter_resultados=False):
+        self.manter_resultados = manter_resultados
+        self._futuros = {}
+        self._lock = threading.Lock()
+        self.execucoes = 0
+        self.compartilhadas = 0
+
+    def do(self, chave, funcao, *args, **kwargs):
+        with self._lock:
+            futuro = self._futuros.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = Future()
+                self._futuros[chave] = futuro
+                self.execucoes += 1
+            else:
+                self.compartilhadas += 1
+
+        if dono:
+            try:
+                futuro.set_result(funcao(*args, **kwargs))
+            except BaseException as e:
+                futuro.set_exception(e)
+            finally:
+                # Falhas nunca ficam memoizadas: a próxima chamada tenta de novo
+                if not self.manter_resultados or futuro.exception() is not None:
+                    with self._lock:
+                        if self._futuros.get(chave) is futuro:
+                            del self._futuros[chave]
+        return futuro.result()
+
+    def stats(self):
+        with self._lock:
+            return {"execucoes": self.execucoes, "compartilhadas": self.compartilhadas, "chaves_ativas": len(self._futuros)}
@@ -0,0 +1,121 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:  # O agrupamento geográfico fica desativado sem NumPy
+    np = None
+
+RAIO_TERRA_KM = 6371.0088
+
+
+def spatial_available():
+    return np is not None
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """
+    Distância em km entre pontos (lat/lng em graus).
+
+    Com NumPy, aceita arrays e faz broadcasting: passar colunas (N, 1) e linhas (1, K)
+    produz a matriz N x K de distâncias sem laços em Python.
+    """
+    if np is not None:
+        lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def _kmeans(lat, lng, k, iteracoes=25):
+    """K-means com distância haversine e inicialização k-means++ determinística."""
+    n = len(lat)
+    rng = np.random.default_rng(0)
+    centros = [0]
+    menor_dist = haversine_km(lat, lng, lat[0], lng[0])
+    for _ in range(1, k):
+        pesos = menor_dist ** 2
+        total = pesos.sum()
+        proximo = int(rng.choice(n, p=pesos / total)) if total > 0 else int(rng.integers(n))
+        centros.append(proximo)
+        menor_dist = np.minimum(menor_dist, haversine_km(lat, lng, lat[proximo], lng[proximo]))
+    c_lat = lat[centros].copy()
+    c_lng = lng[centros].copy()
+
+    rotulos = np.full(n, -1)
+    for _ in range(iteracoes):
+        distancias = haversine_km(lat[:, None], lng[:, None], c_lat[None, :], c_lng[None, :])
+        novos = distancias.argmin(axis=1)
+        if np.array_equal(novos, rotulos):
+            break
+        rotulos = novos
+        contagem = np.bincount(rotulos, minlength=k)
+        ocupados = contagem > 0
+        c_lat[ocupados] = np.bincount(rotulos, weights=lat, minlength=k)[ocupados] / contagem[ocupados]
+        c_lng[ocupados] = np.bincount(rotulos, weights=lng, minlength=k)[ocupados] / contagem[ocupados]
+    return rotulos, c_lat, c_lng
+
+
+def cluster_days(itens, dias_viagem):
+    """
+    Agrupa os pontos (ordenados por score) em regiões, uma por dia da viagem.
+
+    Retorna (grupos, grupos_por_dia): grupos[rank] é a região do ponto (None se ele não
+    tiver coordenadas) e grupos_por_dia[i] é a região preferida do dia i+1. O 1º dia fica
+    com a região do ponto de maior score e os seguintes percorrem as demais regiões pelo
+    centroide mais próximo, para reduzir também o deslocamento entre um dia e outro.
+    Sem NumPy ou sem coordenadas, retorna (None, None).
+    """
+    if np is None:
+        return None, None
+    com_coords = [rank for rank, item in enumerate(itens) if item.lat is not None]
+    k = min(dias_viagem, len(com_coords))
+    if k < 2:
+        return None, None
+
+    lat = np.array([itens[rank].lat for rank in com_coords], dtype=float)
+    lng = np.array([itens[rank].lng for rank in com_coords], dtype=float)
+    rotulos, c_lat, c_lng = _kmeans(lat, lng, k)
+
+    grupos = [None] * len(itens)
+    for rank, rotulo in zip(com_coords, rotulos):
+        grupos[rank] = int(rotulo)
+
+    ocupados = sorted(set(int(r) for r in rotulos))
+    distancias = haversine_km(c_lat[:, None], c_lng[:, None], c_lat[None, :], c_lng[None, :])
+    atual = int(rotulos[0])
+    ordem = [atual]
+    restantes = set(ocupados) - {atual}
+    while restantes:
+        atual = min(restantes, key=lambda g: (distancias[atual, g], g))
+        ordem.append(atual)
+        restantes.remove(atual)
+
+    grupos_por_dia = [ordem[i] if i < len(ordem) else None for i in range(dias_viagem)]
+    return grupos, grupos_por_dia
+
+
+def day_distances_km(dias):
+    """
+    Deslocamento estimado (km, em linha reta) de cada dia, somando os trechos entre as
+    atividades na ordem manhã, tarde, noite. Dias sem ao menos dois pontos com
+    coordenadas ficam com None.
+    """
+    trechos = []
+    for indice, dia in enumerate(dias):
+        pontos = [dia[slot] for slot in ("manha", "tarde", "noite") if dia[slot] and dia[slot].lat is not None]
+        for origem, destino in zip(pontos, pontos[1:]):
+            trechos.append((indice, origem.lat, origem.lng, destino.lat, destino.lng))
+
+    totais = [None] * len(dias)
+    if not trechos:
+        return totais
+    if np is not None:
+        colunas = np.array([t[1:] for t in trechos], dtype=float)
+        distancias = haversine_km(colunas[:, 0], colunas[:, 1], colunas[:, 2], colunas[:, 3]).tolist()
+    else:
+        distancias = [haversine_km(*t[1:]) for t in trechos]
+    for (indice, *_), distancia in zip(trechos, distancias):
+        totais[indice] = (totais[indice] or 0.0) + distancia
+    return totais
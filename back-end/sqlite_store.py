@@ -0,0 +1,37 @@
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    Base dos armazenamentos em arquivo SQLite (cache de respostas e índice de lugares).
+
+    Dá a cada thread a sua conexão e, a cada `purge_every` gravações contadas com
+    _registrar_gravacao, chama purge_expired, que as subclasses implementam.
+    """
+
+    def __init__(self, db_path, purge_every=500):
+        self.db_path = db_path
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._lock_gravacoes = threading.Lock()
+        self._gravacoes = 0
+
+    def _conexao(self):
+        # Conexões SQLite não podem ser compartilhadas entre threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _registrar_gravacao(self):
+        with self._lock_gravacoes:
+            self._gravacoes += 1
+            limpar = self.purge_every and self._gravacoes % self.purge_every == 0
+        if limpar:
+            self.purge_expired()
+
+    def purge_expired(self):
+        raise NotImplementedError
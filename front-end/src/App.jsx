@@ -4,9 +4,25 @@ import TravelForm from './components/TravelForm';
 import RoteiroDisplay from './components/RoteiroDisplay';
 import './App.css';
 
+// Texto curto para o evento de progresso mais recente do streaming
+const descreverProgresso = (progresso) => {
+    switch (progresso.etapa) {
+        case 'geocodificacao':
+            return 'Localizando o destino...';
+        case 'coleta':
+            return `Buscando lugares (${progresso.consultas_concluidas}/${progresso.consultas_total} consultas, ${progresso.candidatos} encontrados)...`;
+        case 'pontuacao':
+            return `Avaliando ${progresso.candidatos} lugares...`;
+        case 'agendamento':
+            return 'Montando os dias...';
+        default:
+            return '';
+    }
+};
+
 function App() {
     // DESESTRUTURAR APENAS AS FUNÇÕES E ESTADOS EXPOSTOS PELO HOOK
-    const { roteiro, loading, error, backendStatus, generateRoteiro, resetRoteiro } = useTravelGenerator();
+    const { roteiro, loading, error, progresso, backendStatus, generateRoteiroStream, resetRoteiro } = useTravelGenerator();
 
     const [currentDestination, setCurrentDestination] = useState('');
     const [showSuccessMessage, setShowSuccessMessage] = useState(false);
@@ -18,7 +34,7 @@ function App() {
         setBudgetSuggestion('');
         setCurrentDestination(travelData.destino);
 
-        await generateRoteiro(travelData);
+        await generateRoteiroStream(travelData);
         
         // Verificação para mostrar mensagem de sucesso
         // Se há um roteiro OU uma sugestão de orçamento vindo do backend (mesmo que roteiro seja vazio mas a sugestão exista)
@@ -38,11 +54,13 @@ function App() {
         setCurrentDestination('');
     };
 
+    // Rola até o roteiro quando o primeiro dia chega (os demais chegam em streaming)
+    const temRoteiro = Boolean(roteiro);
     useEffect(() => {
-        if (roteiro && roteiroRef.current) {
+        if (temRoteiro && roteiroRef.current) {
             roteiroRef.current.scrollIntoView({ behavior: 'smooth' });
         }
-    }, [roteiro]);
+    }, [temRoteiro]);
 
     return (
         <div className="app-container">
@@ -61,11 +79,16 @@ function App() {
                 {showSuccessMessage && !error && (
                     <div className="success-message">
                         <p>Seu roteiro foi gerado com sucesso!</p>
-                        {budgetSuggestion && <p>{budgetSuggestion}</p>}
+                        {(roteiro?.sugestao_orcamento || budgetSuggestion) && <p>{roteiro?.sugestao_orcamento || budgetSuggestion}</p>}
                     </div>
                 )}
 
-                {loading && <p className="loading-message">Gerando seu roteiro, por favor aguarde...</p>}
+                {loading && (
+                    <p className="loading-message">
+                        Gerando seu roteiro, por favor aguarde...
+                        {progresso && <span className="loading-progress"> {descreverProgresso(progresso)}</span>}
+                    </p>
+                )}
                 
                 {roteiro && (
                     <div ref={roteiroRef} className="roteiro-section">
@@ -16,6 +16,9 @@ const RoteiroDisplay = ({ roteiro, error }) => {
       {roteiro.map((dia) => (
         <div key={dia.dia} className="dia-roteiro">
           <h3>Dia {dia.dia}</h3>
+          {dia.distancia_estimada_km != null && (
+            <p className="dia-distancia">Deslocamento estimado: {dia.distancia_estimada_km} km</p>
+          )}
           <ul>
             {dia.atividades.map((atividade, index) => (
               // Usamos dangerouslySetInnerHTML porque o backend está enviando HTML para os links
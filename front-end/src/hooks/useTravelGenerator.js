@@ -1,11 +1,14 @@
-import { useState, useCallback, useEffect } from 'react';
+import { useState, useCallback, useEffect, useRef } from 'react';
 import axios from 'axios'; // Garanta que axios está sendo importado corretamente
 
 const useTravelGenerator = () => {
     const [roteiro, setRoteiro] = useState(null);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
+    const [progresso, setProgresso] = useState(null);
     const [backendStatus, setBackendStatus] = useState("Verificando status do backend...");
+    // Último roteiro recebido por pedido, com o ETag do backend, para reaproveitar em re-submissões
+    const roteirosRecebidos = useRef(new Map());
 
     // Verifica o status do backend ao carregar
     useEffect(() => {
@@ -21,23 +24,78 @@ const useTravelGenerator = () => {
         checkBackendStatus();
     }, []);
 
-    const generateRoteiro = useCallback(async (travelData) => {
+    // Versão em streaming: os dias aparecem à medida que o backend os agenda
+    const generateRoteiroStream = useCallback(async (travelData) => {
         setLoading(true);
         setError(null);
-        setRoteiro(null); // Limpa o roteiro anterior ao gerar um novo
+        setRoteiro(null);
+        setProgresso(null);
+        const dias = [];
+        const chave = JSON.stringify(travelData);
+        const anterior = roteirosRecebidos.current.get(chave);
+
+        const processarEvento = (evento) => {
+            if (evento.tipo === 'progresso') {
+                setProgresso(evento);
+            } else if (evento.tipo === 'dia') {
+                dias.push(evento.dia);
+                setRoteiro({ roteiro: [...dias], sugestao_orcamento: null });
+            } else if (evento.tipo === 'resumo') {
+                const data = { roteiro: [...dias], sugestao_orcamento: evento.sugestao_orcamento };
+                setRoteiro(data);
+                if (evento.etag) {
+                    roteirosRecebidos.current.set(chave, { etag: evento.etag, data });
+                }
+            } else if (evento.tipo === 'erro') {
+                setError(`Erro ao carregar o roteiro: ${evento.mensagem}`);
+                setRoteiro(null);
+            }
+        };
+
         try {
-            const response = await axios.post('http://127.0.0.1:5000/api/generate_roteiro', travelData);
-            setRoteiro(response.data);
+            const response = await fetch('http://127.0.0.1:5000/api/generate_roteiro/stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    ...(anterior ? { 'If-None-Match': `"${anterior.etag}"` } : {}),
+                },
+                body: JSON.stringify(travelData),
+            });
+            // 304: o backend confirmou que o roteiro guardado continua válido
+            if (response.status === 304 && anterior) {
+                setRoteiro(anterior.data);
+                return;
+            }
+            if (!response.ok || !response.body) {
+                const corpo = await response.json().catch(() => null);
+                setError(corpo && corpo.mensagem
+                    ? `Erro ao carregar o roteiro: ${corpo.mensagem}`
+                    : "Erro desconhecido ao gerar roteiro. Tente novamente.");
+                return;
+            }
+
+            // NDJSON: um evento por linha; a última linha pode chegar incompleta
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let pendente = '';
+            for (;;) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                pendente += decoder.decode(value, { stream: true });
+                const linhas = pendente.split('\n');
+                pendente = linhas.pop();
+                linhas.filter((linha) => linha.trim()).forEach((linha) => processarEvento(JSON.parse(linha)));
+            }
+            if (pendente.trim()) {
+                processarEvento(JSON.parse(pendente));
+            }
         } catch (err) {
             console.error("Erro ao gerar roteiro:", err);
-            if (err.response && err.response.data && err.response.data.mensagem) {
-                setError(`Erro ao carregar o roteiro: ${err.response.data.mensagem}`);
-            } else {
-                setError("Erro desconhecido ao gerar roteiro. Tente novamente.");
-            }
-            setRoteiro(null); // Limpar roteiro em caso de erro
+            setError("Erro desconhecido ao gerar roteiro. Tente novamente.");
+            setRoteiro(null);
         } finally {
             setLoading(false);
+            setProgresso(null);
         }
     }, []);
 
@@ -51,8 +109,9 @@ const useTravelGenerator = () => {
         roteiro,
         loading,
         error,
+        progresso,
         backendStatus,
-        generateRoteiro,
+        generateRoteiroStream,
         resetRoteiro // Exponha a nova função de reset
     };
 };